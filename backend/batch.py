@@ -0,0 +1,28 @@
+import asyncio
+
+
+async def run_batch(registry, items, concurrency=4):
+    """
+    Runs one generation pipeline per requested question, at most concurrency at a time.
+    Results come back in request order; a failed question is reported in place
+    rather than failing the whole batch.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(item):
+        async with semaphore:
+            generator = registry.get(item.subject)
+            return await generator.agenerate(topic=item.topic, level=item.level)
+
+    jobs = [item for item in items for _ in range(item.count)]
+    results = await asyncio.gather(*(run_one(item) for item in jobs), return_exceptions=True)
+
+    output = []
+    for item, result in zip(jobs, results):
+        entry = {"subject": item.subject, "topic": item.topic, "level": item.level}
+        if isinstance(result, Exception):
+            entry.update(question=None, error=f"{type(result).__name__}: {result}")
+        else:
+            entry.update(question=result, error=None)
+        output.append(entry)
+    return output
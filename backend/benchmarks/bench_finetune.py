@@ -0,0 +1,100 @@
+"""
+Runs the fine-tune orchestrator (training/finetune.py) against the fake datasets and fine-tuning
+APIs, to check upload reuse, resumption and concurrency offline.
+
+    python benchmarks/bench_finetune.py [--subjects compsci calculus testing] [--time-scale 0.05]
+
+Three runs share one fake Cohere account and one manifest:
+  fresh     every subject uploads its data and fine-tunes, concurrently
+  rerun     unchanged data: no uploads, the finished fine-tunes are found in the manifest
+  resume    a run with new data is cancelled mid-flight and restarted; the restart must not
+            upload or create anything the cancelled run already did
+"""
+
+import argparse
+import asyncio
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND / "training"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_cohere import AsyncFakeCohere, FakeCohere
+from finetune import DATA_DIR, FinetuneManifest, FinetuneOrchestrator
+
+
+async def timed_run(co, manifest, data_dir, subjects, args, names=None):
+    orchestrator = FinetuneOrchestrator(co, manifest, data_dir, poll_interval=args.poll, log=lambda line: None)
+    start = time.perf_counter()
+    results = await orchestrator.run(subjects, names)
+    return orchestrator, results, time.perf_counter() - start
+
+
+def report(label, orchestrator, results, elapsed, co):
+    failed = [subject for subject, result in results.items() if isinstance(result, BaseException)]
+    print(
+        f"{label:<8} {elapsed:6.2f}s  uploads {orchestrator.uploads}  reused {orchestrator.reused}  "
+        f"fine-tunes created {len(co.finetuning.models)}  failed {failed or 'none'}"
+    )
+    for subject in failed:
+        print(f"         {subject}: {results[subject]!r}")
+
+
+async def main(args):
+    scale = args.time_scale
+    fake = FakeCohere(latency={"validate": 2.0 * scale, "finetune": 10.0 * scale}, sigma=args.sigma, seed=args.seed)
+    co = AsyncFakeCohere(fake)
+    workdir = Path(tempfile.mkdtemp(prefix="bench_finetune_"))
+    try:
+        data_dir = workdir / "data"
+        for subject in args.subjects:
+            shutil.copytree(DATA_DIR / subject, data_dir / subject)
+        manifest = FinetuneManifest(workdir / "manifest.sqlite")
+
+        orchestrator, results, elapsed = await timed_run(co, manifest, data_dir, args.subjects, args)
+        report("fresh", orchestrator, results, elapsed, co)
+        durations = [model["duration"] for model in co.finetuning.models.values()]
+        if durations:
+            print(f"         longest fine-tune {max(durations):.2f}s, all fine-tunes back to back {sum(durations):.2f}s")
+
+        orchestrator, results, elapsed = await timed_run(co, manifest, data_dir, args.subjects, args)
+        report("rerun", orchestrator, results, elapsed, co)
+
+        # new data and model names, interrupted once every dataset has been uploaded
+        for subject in args.subjects:
+            with open(data_dir / subject / "training.jsonl", "a", encoding="utf-8") as f:
+                f.write("\n" + (data_dir / subject / "eval.jsonl").read_text(encoding="utf-8").strip())
+        names = {subject: f"{subject}-generator-v2" for subject in args.subjects}
+        uploads_before, created_before = co.datasets.uploads, len(co.finetuning.models)
+        run = asyncio.create_task(timed_run(co, manifest, data_dir, args.subjects, args, names))
+        while len(co.finetuning.models) - created_before < len(args.subjects) and not run.done():
+            await asyncio.sleep(0.01)
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
+        uploads_cancelled = co.datasets.uploads - uploads_before
+        created_cancelled = len(co.finetuning.models) - created_before
+
+        orchestrator, results, elapsed = await timed_run(co, manifest, data_dir, args.subjects, args, names)
+        report("resume", orchestrator, results, elapsed, co)
+        duplicated = (co.datasets.uploads - uploads_before - uploads_cancelled) + (
+            len(co.finetuning.models) - created_before - created_cancelled
+        )
+        print(f"         cancelled run uploaded {uploads_cancelled} and created {created_cancelled}; restart repeated {duplicated}")
+        manifest.close()
+        return 1 if duplicated else 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subjects", nargs="+", default=["compsci", "calculus", "testing"])
+    parser.add_argument("--time-scale", type=float, default=0.05, help="fake validation takes 2s and fine-tuning 10s at 1.0")
+    parser.add_argument("--sigma", type=float, default=0.3)
+    parser.add_argument("--poll", type=float, default=0.05, help="longest wait between status checks")
+    parser.add_argument("--seed", type=int, default=None)
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
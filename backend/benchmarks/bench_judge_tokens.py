@@ -0,0 +1,112 @@
+"""
+Compares judge prompt and response sizes with and without patch mode.
+
+    python benchmarks/bench_judge_tokens.py [--live]
+
+Offline, questions are taken from the fine-tuning data and tokens are estimated as chars / 4.
+The "before" input is the old str(question) repr, the "after" input is compact JSON. Output
+compares echoing the whole question against a patch that changes one part's markscheme,
+which is the typical judge edit (the longest one, to be conservative). With --live the four judge calls are made against the
+Cohere API (COHERE_KEY in .env) and the usage reported by the API is printed instead.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+import judge
+from formatter import CSFormatter, MathAAFormatter, local_json
+
+DATASETS = {
+    "math": (BACKEND / "training/data/calculus/training.jsonl", MathAAFormatter.SCHEMA, judge.AAMathJudge),
+    "cs": (BACKEND / "training/data/compsci/training.jsonl", CSFormatter.SCHEMA, judge.CSJudge),
+}
+
+
+def estimate_tokens(text):
+    return len(text) / 4
+
+
+def prompt_tokens(request):
+    return estimate_tokens("".join(message["content"] for message in request["messages"]))
+
+
+def sample_questions(path, schema, defaults):
+    for line in path.read_text().splitlines():
+        for message in json.loads(line)["messages"]:
+            if message["role"] != "Chatbot":
+                continue
+            question = local_json.parse(message["content"], schema, defaults)
+            if question is None:
+                # older samples leave out marks or subtopics on some parts; fill them so sizes are comparable
+                question = local_json.parse_fields(message["content"]) or {}
+                if not isinstance(question.get("parts"), list):
+                    continue
+                question = {**defaults, **question}
+                for part in question["parts"]:
+                    part.setdefault("marks", 1)
+                    part.setdefault("markscheme", "")
+                    part.setdefault("subtopics", [])
+            yield question
+
+
+def offline(subject):
+    path, schema, judge_cls = DATASETS[subject]
+    questions = list(sample_questions(path, schema, {"topic": subject, "question": ""}))
+    if not questions:
+        print(f"{subject}: no complete sample questions in {path.name}")
+        return
+
+    old_in, compact_in, patch_in, full_out, patch_out = [], [], [], [], []
+    for question in questions:
+        full_judge, patch_judge = judge_cls(None, None), judge_cls(None, None, patch=True)
+        compact_request = full_judge.judge_markscheme_request(question)
+        old_request = full_judge.judge_markscheme_request(question)
+        old_request["messages"][-1]["content"] = str(question)
+        patch_request = patch_judge.prepare(patch_judge.judge_markscheme_request(question))
+
+        old_in.append(prompt_tokens(old_request))
+        compact_in.append(prompt_tokens(compact_request))
+        patch_in.append(prompt_tokens(patch_request))
+        full_out.append(estimate_tokens(full_judge.serialize({**question, "score": 90})))
+        # conservative: the edited part is the one with the longest markscheme
+        edited = max(question["parts"], key=lambda part: len(part["markscheme"]))
+        patch = {"parts": [{"order": edited["order"], "markscheme": edited["markscheme"]}], "score": 90}
+        patch_out.append(estimate_tokens(patch_judge.serialize(patch)))
+
+    print(f"{subject}: {len(questions)} sample questions, estimated tokens per judge call")
+    print(
+        f"  input   repr {statistics.mean(old_in):6.0f}   compact {statistics.mean(compact_in):6.0f}"
+        f"   compact + patch instructions {statistics.mean(patch_in):6.0f}"
+    )
+    print(f"  output  full {statistics.mean(full_out):6.0f}   patch   {statistics.mean(patch_out):6.0f}")
+
+
+def live(subject):
+    import cohere
+    from dotenv import dotenv_values
+
+    path, schema, judge_cls = DATASETS[subject]
+    question = next(sample_questions(path, schema, {"topic": subject, "question": ""}))
+    co = cohere.ClientV2(dotenv_values(BACKEND / ".env").get("COHERE_KEY"))
+
+    for patch in (False, True):
+        judge_obj = judge_cls(co, "command-a-03-2025", patch=patch)
+        for name, build in (("question", judge_obj.judge_question_request), ("markscheme", judge_obj.judge_markscheme_request)):
+            response = co.chat(**judge_obj.prepare(build(question)))
+            tokens = response.usage.tokens
+            print(f"{subject} judge_{name:<11} patch={patch!s:<5} in {tokens.input_tokens:6.0f}  out {tokens.output_tokens:6.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    for subject in DATASETS:
+        live(subject) if args.live else offline(subject)
@@ -0,0 +1,122 @@
+"""
+Times POST /papers against a stocked question store, and with stock that falls short so the gaps
+are generated through the fake Cohere client.
+
+    python benchmarks/bench_papers.py [--stock 20000] [--marks 100] [--papers 20]
+
+The store is filled with synthetic math questions of 1-15 marks over a few topics and levels.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx
+
+import main
+from fake_cohere import MATH_PARTS, fake_upstream
+from registry import GeneratorRegistry
+from store import QuestionStore
+
+TOPICS = ["Calculus", "Algebra", "Statistics and probability", "Geometry and trigonometry"]
+SUBTOPICS = ["Integration by substitution", "Definite integrals", "Sequences", "Binomial theorem"]
+
+
+def stock(path, count, seed):
+    rng = random.Random(seed)
+    store = QuestionStore(path)
+    for index in range(count):
+        parts = [
+            {**part, "marks": rng.randint(1, 8), "subtopics": [rng.choice(SUBTOPICS)]}
+            for part in MATH_PARTS[: rng.randint(1, 2)]
+        ]
+        question = {"id": f"stock-{index}", "topic": rng.choice(TOPICS), "parts": parts}
+        store.add(question, "math", rng.choice(["SL", "HL"]), {"question": rng.randint(80, 100)})
+    store.close()
+
+
+async def papers(http, body, count):
+    timings, results = [], []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await http.post("/papers", json=body)
+        timings.append(time.perf_counter() - start)
+        results.append(response.json())
+    return timings, results
+
+
+def report(label, timings, results):
+    last = results[-1]
+    print(
+        f"{label:<10} median {statistics.median(timings) * 1000:7.1f} ms  max {max(timings) * 1000:7.1f} ms  "
+        f"marks {last['marks']}/{last['total_marks']}  generated {last['generated']}  "
+        f"questions {sum(len(section['questions']) for section in last['sections'])}"
+    )
+
+
+async def run(args):
+    upstreams = {"offline-key-0": fake_upstream(latency={"generate": 0.02, "format": 0.01, "judge": 0.015})}
+    sections = [
+        {"topic": "Calculus", "level": "HL", "weight": 2},
+        {"topic": "Algebra", "level": "HL", "weight": 1},
+        {"subtopic": "Binomial theorem", "level": "HL", "weight": 1},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        env_path = os.path.join(tmp, ".env")
+        settings = {
+            "COHERE_KEYS": ",".join(upstreams),
+            "KEY_LIMIT": "1000000",
+            "QUESTION_STORE_PATH": os.path.join(tmp, "questions.sqlite"),
+            "DEDUP_PATH": os.path.join(tmp, "dedup.sqlite"),
+            "JOBS_PATH": os.path.join(tmp, "jobs.sqlite"),
+            "JUDGE_POLICY_PATH": os.path.join(tmp, "judge_policy.sqlite"),
+            "DEDUP": "0",
+        }
+        with open(env_path, "w") as f:
+            f.writelines(f"{key}={value}\n" for key, value in settings.items())
+        start = time.perf_counter()
+        stock(settings["QUESTION_STORE_PATH"], args.stock, args.seed)
+        print(f"stocked {args.stock} questions in {time.perf_counter() - start:.1f} s")
+
+        main.app.state.registry = GeneratorRegistry(env_path=env_path, upstream=upstreams.get)
+        transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+        async with main.app.router.lifespan_context(main.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+                body = {"subject": "math", "total_marks": args.marks, "sections": sections, "time_budget": 0}
+                timings, results = await papers(http, body, 1)
+                report("first", timings, results)  # includes building the index
+                timings, results = await papers(http, body, args.papers)
+                report("stocked", timings, results)
+
+                # SL Geometry has no stock at all, so every mark of it has to be generated
+                body = {
+                    "subject": "math",
+                    "total_marks": args.marks,
+                    "sections": sections + [{"topic": "Geometry (new)", "level": "SL", "weight": 1}],
+                    "time_budget": 30,
+                    "concurrency": 8,
+                }
+                timings, results = await papers(http, body, 1)
+                report("gaps", timings, results)
+                if results[-1]["generation_errors"]:
+                    print("errors", results[-1]["generation_errors"][:3])
+        main.app.state.registry = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stock", type=int, default=20000)
+    parser.add_argument("--marks", type=int, default=100)
+    parser.add_argument("--papers", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
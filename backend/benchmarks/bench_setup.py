@@ -0,0 +1,92 @@
+"""
+Measures the per-request setup cost that GeneratorRegistry removes.
+
+    python benchmarks/bench_setup.py [--iterations 200] [--network]
+
+Without --network only object setup is timed (reading .env, building the Cohere client,
+formatter and judge). With --network it also times the connection cost of ~6 LLM calls
+made on fresh clients versus one keep-alive pool.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+import generator
+from registry import GeneratorRegistry
+
+CALLS_PER_QUESTION = 6
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<40} mean {statistics.mean(samples) * 1000:8.3f} ms   p95 {p95 * 1000:8.3f} ms")
+
+
+def bench_setup(env_path, iterations):
+    def per_request():
+        generator.MathAAGenerator(env_path=env_path)
+        generator.CSGenerator(env_path=env_path)
+
+    registry = GeneratorRegistry(env_path=env_path)
+
+    def shared():
+        registry.get("math")
+        registry.get("cs")
+
+    report("per-request generators", timed(per_request, iterations))
+    report("registry lookup", timed(shared, iterations))
+    asyncio.run(registry.aclose())
+
+
+def bench_network(iterations, url="https://api.cohere.com"):
+    def fresh_clients():
+        for _ in range(CALLS_PER_QUESTION):
+            with httpx.Client() as client:
+                client.head(url)
+
+    pool = httpx.Client()
+
+    def keep_alive():
+        for _ in range(CALLS_PER_QUESTION):
+            pool.head(url)
+
+    keep_alive()  # warm the pool, as the registry does after the first request
+    report(f"{CALLS_PER_QUESTION} calls, fresh client each", timed(fresh_clients, iterations))
+    report(f"{CALLS_PER_QUESTION} calls, shared keep-alive pool", timed(keep_alive, iterations))
+    pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--network", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env_path = os.path.join(tmp, ".env")
+        with open(env_path, "w") as f:
+            f.write("COHERE_KEY=benchmark\n")
+        bench_setup(env_path, args.iterations)
+
+    if args.network:
+        bench_network(max(args.iterations // 20, 5))
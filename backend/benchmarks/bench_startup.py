@@ -0,0 +1,106 @@
+"""
+Startup benchmark: profiles `import main` with -X importtime and checks that the slow imports
+(the Cohere SDK and the generator pipeline) are deferred until after the server is up.
+
+    python benchmarks/bench_startup.py [--top 15] [--budget-ms 1500] [--serve]
+
+Prints the modules with the largest cumulative import time and exits non-zero if a deferred
+module is imported by main or the import takes longer than --budget-ms. With --serve it also
+starts uvicorn and times how long until GET / answers.
+"""
+
+import argparse
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+# must not be imported before the server binds
+DEFERRED = ["cohere", "registry", "generator", "formatter", "judge", "dedup"]
+
+
+def import_profile():
+    """
+    Returns [(module, self_us, cumulative_us)] for `import main`, in import order.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import main failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def time_to_first_response(timeout=60):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1)
+                return time.perf_counter() - start
+            except urllib.error.HTTPError:  # any HTTP answer means the server is serving
+                return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        return None
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(args):
+    rows = import_profile()
+    total_us = sum(self_us for _, self_us, _ in rows)
+    print(f"import main: {total_us / 1000:.1f} ms across {len(rows)} modules\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[: args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+
+    failures = []
+    imported = {name for name, _, _ in rows}
+    for module in DEFERRED:
+        if module in imported:
+            failures.append(f"{module} is imported at startup")
+    if args.budget_ms is not None and total_us / 1000 > args.budget_ms:
+        failures.append(f"import main took {total_us / 1000:.1f} ms, over the {args.budget_ms} ms budget")
+
+    if args.serve:
+        seconds = time_to_first_response()
+        print(f"\nGET / answered after {seconds:.2f} s" if seconds is not None else "\nGET / never answered")
+        if seconds is None:
+            failures.append("the server did not answer GET /")
+
+    if failures:
+        print("\nFAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nOK: deferred modules stay out of startup")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--serve", action="store_true")
+    main(parser.parse_args())
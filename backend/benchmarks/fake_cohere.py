@@ -0,0 +1,285 @@
+"""
+In-process stand-in for cohere.ClientV2 / AsyncClientV2 chat, for offline benchmarks, and for the
+async datasets and fine-tuning APIs used by training/finetune.py.
+
+Responses are schema-valid canned questions: the generation call returns the 'field: value'
+layout the fine-tuned models emit, formatter calls return JSON matching the requested schema,
+and judge calls echo the question (or an empty patch) with a random score. Latency, error
+rate and 429 behaviour are configurable. Uploaded datasets are validated line by line after a
+"validate" delay, and fine-tunes move from queued to ready over a "finetune" delay.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from types import SimpleNamespace
+
+MATH_PARTS = [
+    {
+        "content": "Find \\(\\int 6x(3x^2 + 1)^4 \\, dx\\).",
+        "marks": 3,
+        "markscheme": "Let \\(u = 3x^2 + 1\\) [M1]\\n\\(\\frac{(3x^2 + 1)^5}{5} + c\\) [A2]",
+        "subtopics": ["Integration by substitution"],
+        "order": 1,
+    },
+    {
+        "content": "Hence evaluate \\(\\int_0^1 6x(3x^2 + 1)^4 \\, dx\\).",
+        "marks": 2,
+        "markscheme": "\\(\\frac{4^5 - 1}{5}\\) [M1]\\n\\(= 204.6\\) [A1]",
+        "subtopics": ["Definite integrals"],
+        "order": 2,
+    },
+]
+
+CS_PARTS = [
+    {
+        "content": "State one input device commonly used in automated control systems.",
+        "marks": 1,
+        "markscheme": "Award [1 max]\\nSensor;\\nThermometer;",
+        "subtopics": ["Control"],
+        "order": 1,
+    },
+    {
+        "content": "Explain how a feedback loop enables a control system to maintain a desired output.",
+        "marks": 4,
+        "markscheme": "Award [4 max]\\nSensor measures output;\\nCompared with setpoint;\\nError calculated;\\nOutput adjusted;",
+        "subtopics": ["Control"],
+        "order": 2,
+    },
+]
+
+
+class FakeApiError(Exception):
+    """
+    Mirrors the status_code / headers attributes of cohere.core.api_error.ApiError.
+    """
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"fake upstream error {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeCohere:
+    """
+    latency: {kind: median seconds} for kind in generate / format / judge, log-normally
+    distributed with the given sigma. error_rate and throttle_rate are the chance a call fails
+    with a 500 or 429. quota enforces a calls-per-minute limit the way the real key does.
+    """
+
+    def __init__(
+        self,
+        latency=None,
+        sigma=0.3,
+        error_rate=0.0,
+        throttle_rate=0.0,
+        quota=None,
+        json_generation_rate=0.5,
+        score_range=(85, 100),
+        seed=None,
+    ):
+        self.latency = {"generate": 2.0, "format": 1.0, "judge": 1.5, "validate": 2.0, "finetune": 10.0, **(latency or {})}
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.quota = quota
+        self.json_generation_rate = json_generation_rate
+        self.score_range = score_range
+        self.random = random.Random(seed)
+        self.calls = {"generate": 0, "format": 0, "judge": 0}
+        self.errors = {429: 0, 500: 0}
+        self._window = deque()
+        self._lock = threading.Lock()
+
+    def kind(self, response_format):
+        if response_format is None:
+            return "generate"
+        if "score" in response_format["schema"].get("required", []):
+            return "judge"
+        return "format"
+
+    def delay(self, kind):
+        return self.random.lognormvariate(0, self.sigma) * self.latency[kind]
+
+    def check_limits(self):
+        with self._lock:
+            now = time.monotonic()
+            while self._window and now - self._window[0] > 60:
+                self._window.popleft()
+            if self.quota is not None and len(self._window) >= self.quota:
+                self.errors[429] += 1
+                raise FakeApiError(429, {"Retry-After": str(round(60 - (now - self._window[0]), 1))})
+            self._window.append(now)
+            if self.random.random() < self.throttle_rate:
+                self.errors[429] += 1
+                raise FakeApiError(429)
+            if self.random.random() < self.error_rate:
+                self.errors[500] += 1
+                raise FakeApiError(500)
+
+    def respond(self, kind, model, messages, response_format):
+        self.calls[kind] += 1
+        system = messages[0]["content"]
+        is_cs = "Computer Science" in system or '"question"' in json.dumps(response_format or {})
+        parts = CS_PARTS if is_cs else MATH_PARTS
+        topic = messages[-1]["content"] if kind == "generate" else "Calculus"
+
+        if kind == "generate":
+            if self.random.random() < self.json_generation_rate:
+                text = f"topic: {topic}\nparts: {json.dumps(parts)}"
+            else:
+                # missing fields, so the formatter has to fall back to its LLM call
+                text = f"content: {parts[0]['content']}\nmarks: {parts[0]['marks']}"
+        elif kind == "format":
+            question = {"question": "A control system regulates temperature.", "parts": parts}
+            text = json.dumps(question if is_cs else {"topic": topic, "parts": parts})
+        else:
+            score = self.random.randint(*self.score_range)
+            if response_format["schema"]["properties"]["parts"]["items"]["required"] == ["order"]:  # patch mode
+                text = json.dumps({"parts": [], "score": score})
+            else:
+                question = json.loads(messages[-1]["content"].split("\n\nAutomated checks")[0])
+                question.setdefault("topic", topic)
+                question.setdefault("question", "")
+                text = json.dumps({**question, "score": score})
+
+        prompt_chars = sum(len(message["content"]) for message in messages)
+        tokens = SimpleNamespace(input_tokens=prompt_chars // 4, output_tokens=len(text) // 4)
+        return SimpleNamespace(
+            message=SimpleNamespace(role="assistant", content=[SimpleNamespace(type="text", text=text)]),
+            usage=SimpleNamespace(tokens=tokens, billed_units=tokens),
+        )
+
+    def chat(self, model=None, messages=None, response_format=None, **kwargs):
+        kind = self.kind(response_format)
+        time.sleep(self.delay(kind))
+        self.check_limits()
+        return self.respond(kind, model, messages, response_format)
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+
+class AsyncFakeDatasets:
+    """
+    co.datasets: create() reads the uploaded files and validation finishes after a "validate"
+    delay, failing if any line is not a JSON record with a messages list.
+    """
+
+    def __init__(self, fake):
+        self.fake = fake
+        self.datasets = {}
+        self.uploads = 0
+        self.bytes_uploaded = 0
+
+    @staticmethod
+    def validation_error(lines):
+        for number, line in enumerate(lines, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return f"line {number} is not valid JSON"
+            if not isinstance(record, dict) or not isinstance(record.get("messages"), list):
+                return f"line {number} has no messages list"
+        return None
+
+    async def create(self, name=None, data=None, eval_data=None, type=None, **kwargs):
+        self.fake.check_limits()
+        content = data.read() + b"\n" + (eval_data.read() if eval_data is not None else b"")
+        self.uploads += 1
+        self.bytes_uploaded += len(content)
+        id = f"{name}-{uuid.uuid4().hex[:8]}"
+        lines = [line for line in content.decode("utf-8").splitlines() if line.strip()]
+        self.datasets[id] = {
+            "name": name,
+            "ready_at": time.monotonic() + self.fake.delay("validate"),
+            "error": self.validation_error(lines),
+        }
+        return SimpleNamespace(id=id)
+
+    async def get(self, id, **kwargs):
+        self.fake.check_limits()
+        if id not in self.datasets:
+            raise FakeApiError(404)
+        dataset = self.datasets[id]
+        if time.monotonic() < dataset["ready_at"]:
+            status, error = "processing", None
+        else:
+            status, error = ("failed" if dataset["error"] else "validated"), dataset["error"]
+        return SimpleNamespace(
+            dataset=SimpleNamespace(id=id, name=dataset["name"], validation_status=status, validation_error=error)
+        )
+
+
+class AsyncFakeFinetuning:
+    """
+    co.finetuning: a fine-tune is queued for a tenth of its "finetune" delay, then trains until
+    the delay is up and becomes ready. Unvalidated datasets are rejected with a 400.
+    """
+
+    def __init__(self, fake, datasets):
+        self.fake = fake
+        self.datasets = datasets
+        self.models = {}
+
+    def model(self, id):
+        model = self.models[id]
+        elapsed = time.monotonic() - model["created"]
+        if elapsed < model["duration"] / 10:
+            status = "STATUS_QUEUED"
+        elif elapsed < model["duration"]:
+            status = "STATUS_FINETUNING"
+        else:
+            status = "STATUS_READY"
+        return SimpleNamespace(id=id, name=model["name"], settings=model["settings"], status=status)
+
+    async def create_finetuned_model(self, request=None, **kwargs):
+        self.fake.check_limits()
+        dataset = (await self.datasets.get(request.settings.dataset_id)).dataset
+        if dataset.validation_status != "validated":
+            raise FakeApiError(400)
+        if any(model["name"] == request.name for model in self.models.values()):
+            raise FakeApiError(409)
+        id = uuid.uuid4().hex
+        self.models[id] = {
+            "name": request.name,
+            "settings": request.settings,
+            "created": time.monotonic(),
+            "duration": self.fake.delay("finetune"),
+        }
+        return SimpleNamespace(finetuned_model=self.model(id))
+
+    async def get_finetuned_model(self, id, **kwargs):
+        self.fake.check_limits()
+        if id not in self.models:
+            raise FakeApiError(404)
+        return SimpleNamespace(finetuned_model=self.model(id))
+
+
+class AsyncFakeCohere:
+    """
+    Async view of a FakeCohere, sharing its counters and quota.
+    """
+
+    def __init__(self, fake):
+        self.fake = fake
+        self.datasets = AsyncFakeDatasets(fake)
+        self.finetuning = AsyncFakeFinetuning(fake, self.datasets)
+
+    async def chat(self, model=None, messages=None, response_format=None, **kwargs):
+        kind = self.fake.kind(response_format)
+        await asyncio.sleep(self.fake.delay(kind))
+        self.fake.check_limits()
+        return self.fake.respond(kind, model, messages, response_format)
+
+
+def fake_upstream(**kwargs):
+    """
+    Returns a (sync, async) pair to pass as GeneratorRegistry(upstream=...).
+    """
+    fake = FakeCohere(**kwargs)
+    return fake, AsyncFakeCohere(fake)
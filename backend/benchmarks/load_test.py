@@ -0,0 +1,130 @@
+"""
+Offline load test: drives the FastAPI app in main.py against the fake Cohere client.
+
+    python benchmarks/load_test.py --questions 50 --concurrency 10 --time-scale 0.01
+    python benchmarks/load_test.py --quota 10 --time-scale 1 --env JUDGE_MODE=parts
+
+Reports throughput, p50/p95/p99 latency and upstream calls per question. Latencies are the
+fake's medians multiplied by --time-scale, so runs stay short; throughput scales accordingly.
+Any .env setting can be passed with --env KEY=VALUE (KEY_LIMIT defaults to no practical limit).
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx
+
+import main
+from fake_cohere import fake_upstream
+from registry import GeneratorRegistry
+
+ENDPOINTS = {"math": "/generate/math", "cs": "/generate/cs"}
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))]
+
+
+async def drive(app, questions, concurrency, subjects):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(index):
+        nonlocal failures
+        subject = subjects[index % len(subjects)]
+        async with semaphore:
+            start = time.perf_counter()
+            response = await http.post(ENDPOINTS[subject], json={})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failures += 1
+
+    # upstream errors the pipeline does not retry come back as 500s rather than raising here
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(questions)))
+        elapsed = time.perf_counter() - start
+    return latencies, failures, elapsed
+
+
+async def run(args):
+    scale = args.time_scale
+    # one fake per key, each with its own quota
+    upstreams = {
+        f"offline-key-{index}": fake_upstream(
+            latency={"generate": args.generate_latency * scale, "format": args.format_latency * scale, "judge": args.judge_latency * scale},
+            sigma=args.sigma,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            quota=args.quota,
+            json_generation_rate=args.json_rate,
+            seed=None if args.seed is None else args.seed + index,
+        )
+        for index in range(args.keys)
+    }
+    fakes = [fake for fake, _ in upstreams.values()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env_path = os.path.join(tmp, ".env")
+        settings = {
+            "COHERE_KEYS": ",".join(upstreams),
+            "KEY_LIMIT": "1000000",
+            "QUESTION_STORE_PATH": os.path.join(tmp, "questions.sqlite"),
+            "DEDUP_PATH": os.path.join(tmp, "dedup.sqlite"),
+            "JOBS_PATH": os.path.join(tmp, "jobs.sqlite"),
+            "JUDGE_POLICY_PATH": os.path.join(tmp, "judge_policy.sqlite"),
+            # the fake returns the same canned question every time
+            "DEDUP": "0",
+            **dict(item.split("=", 1) for item in args.env),
+        }
+        with open(env_path, "w") as f:
+            f.writelines(f"{key}={value}\n" for key, value in settings.items())
+
+        main.app.state.registry = GeneratorRegistry(env_path=env_path, upstream=upstreams.get)
+        async with main.app.router.lifespan_context(main.app):
+            latencies, failures, elapsed = await drive(main.app, args.questions, args.concurrency, args.subjects)
+        main.app.state.registry = None
+
+    ok = len(latencies) - failures
+    calls = sum(fake.total_calls() for fake in fakes)
+    print(f"questions        {len(latencies)} ({failures} failed) at concurrency {args.concurrency}")
+    print(f"wall time        {elapsed:.2f} s")
+    print(f"throughput       {len(latencies) / elapsed:.2f} questions/s")
+    for q in (50, 95, 99):
+        print(f"p{q:<15} {percentile(latencies, q) * 1000:.1f} ms")
+    print(f"mean             {statistics.mean(latencies) * 1000:.1f} ms")
+    print(f"upstream calls   {calls} ({calls / max(ok, 1):.2f} per question)")
+    for key, fake in zip(upstreams, fakes):
+        print(f"  {key:<14} {fake.calls} errors {fake.errors}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--subjects", nargs="+", default=["math", "cs"], choices=sorted(ENDPOINTS))
+    parser.add_argument("--time-scale", type=float, default=0.01)
+    parser.add_argument("--generate-latency", type=float, default=2.0)
+    parser.add_argument("--format-latency", type=float, default=1.0)
+    parser.add_argument("--judge-latency", type=float, default=1.5)
+    parser.add_argument("--sigma", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--quota", type=int, default=None, help="upstream calls per minute per key before 429s")
+    parser.add_argument("--keys", type=int, default=1, help="API keys in the pool, each with its own fake upstream")
+    parser.add_argument("--json-rate", type=float, default=0.5, help="share of generations the fast path can parse")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE")
+    asyncio.run(run(parser.parse_args()))
@@ -1,25 +1,22 @@
-import os
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
-import uvicorn
-from pathlib import Path
+"""
+Prepares the built frontend in static/ for bundling: writes gzip (and, with the brotli package
+installed, brotli) copies of every compressible file, at the highest compression level, so the
+server can send them as they are instead of compressing on first request.
 
-app = FastAPI()
+    python bundle.py [static dir]
 
-# Path to static directory (e.g., React or Vue build)
-STATIC_DIR = Path(__file__).parent / "static"
+Serving, caching headers and the SPA fallback are in main.py and static_assets.py.
+"""
 
-# Mount the static directory
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+import sys
+from pathlib import Path
 
-# Fallback for SPA routing (serves index.html)
-@app.get("/{full_path:path}")
-async def spa_fallback(full_path: str):
-    index_file = STATIC_DIR / "index.html"
-    if index_file.exists():
-        return FileResponse(index_file)
-    return {"error": "index.html not found"}
+from static_assets import StaticAssets, brotli
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=False)
\ No newline at end of file
+    directory = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent / "static"
+    if not directory.is_dir():
+        sys.exit(f"{directory} does not exist; build the frontend first.")
+    written = StaticAssets(directory).precompress()
+    encodings = "gzip and brotli" if brotli is not None else "gzip (pip install brotli for brotli)"
+    print(f"wrote {written} precompressed files ({encodings}) in {directory}")
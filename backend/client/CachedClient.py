@@ -0,0 +1,49 @@
+from .ResponseCache import cache_key, cached_response
+
+
+class CachedClient:
+    """
+    Wraps a chat client so identical requests are answered from a ResponseCache.
+    Calls to bypass_models (the fine-tuned generators, where variety matters) always go upstream,
+    as does everything while bypass is set.
+    """
+
+    def __init__(self, co, cache, bypass_models=(), bypass=False):
+        self.co = co
+        self.cache = cache
+        self.bypass_models = set(bypass_models)
+        self.bypass = bypass
+
+    def __getattr__(self, name):
+        return getattr(self.co, name)
+
+    def lookup(self, kwargs):
+        if self.bypass or kwargs.get("model") in self.bypass_models:
+            return None, None
+        key = cache_key(kwargs.get("model"), kwargs.get("messages"), kwargs.get("response_format"))
+        text = self.cache.get(key)
+        return key, (cached_response(text) if text is not None else None)
+
+    def chat(self, **kwargs):
+        key, response = self.lookup(kwargs)
+        if response is not None:
+            return response
+        response = self.co.chat(**kwargs)
+        if key is not None:
+            self.cache.put(key, response.message.content[0].text)
+        return response
+
+
+class AsyncCachedClient(CachedClient):
+    """
+    CachedClient for the async clients.
+    """
+
+    async def chat(self, **kwargs):
+        key, response = self.lookup(kwargs)
+        if response is not None:
+            return response
+        response = await self.co.chat(**kwargs)
+        if key is not None:
+            self.cache.put(key, response.message.content[0].text)
+        return response
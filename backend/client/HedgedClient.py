@@ -0,0 +1,64 @@
+import asyncio
+import time
+from collections import deque
+
+import metrics
+
+
+class AsyncHedgedClient:
+    """
+    Wraps an async chat client so a call still running after the p95 latency seen for its model
+    (and kind: plain generation or structured output) is sent a second time, and whichever copy
+    answers first is used; the other is cancelled. The duplicate takes a slot from the key's
+    RateLimiter and is only sent when a token is free right now, so hedging spends idle budget only.
+    """
+
+    def __init__(self, co, limiter, min_samples=20, window=200, quantile=0.95):
+        self.co = co
+        self.limiter = limiter
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self.window = window
+        self.latencies = {}
+
+    def __getattr__(self, name):
+        return getattr(self.co, name)
+
+    def threshold(self, key):
+        samples = self.latencies.get(key)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(self.quantile * (len(ordered) - 1))]
+
+    async def timed_chat(self, key, kwargs):
+        start = time.monotonic()
+        response = await self.co.chat(**kwargs)
+        self.latencies.setdefault(key, deque(maxlen=self.window)).append(time.monotonic() - start)
+        return response
+
+    async def chat(self, **kwargs):
+        key = (kwargs.get("model"), kwargs.get("response_format") is not None)
+        threshold = self.threshold(key)
+        primary = asyncio.create_task(self.timed_chat(key, kwargs))
+        pending = {primary}
+        try:
+            if threshold is not None:
+                done, _ = await asyncio.wait(pending, timeout=threshold)
+                if not done and self.limiter.try_acquire():
+                    pending.add(asyncio.create_task(self.timed_chat(key, kwargs)))
+                    metrics.HEDGED_CALLS.labels(kwargs.get("model"), "sent").inc()
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            metrics.HEDGED_CALLS.labels(kwargs.get("model"), "won").inc()
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
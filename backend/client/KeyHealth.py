@@ -0,0 +1,45 @@
+import time
+
+# auth failures, rate limiting and server errors count against a key
+EJECT_STATUSES = {401, 403, 429}
+
+
+def counts_against_key(status):
+    return status in EJECT_STATUSES or (status is not None and status >= 500)
+
+
+class KeyHealth:
+    """
+    Tracks consecutive failures for one API key. After threshold 401/429/5xx responses in a row
+    the key is ejected for cooldown seconds, so new questions are routed to the other keys.
+    """
+
+    def __init__(self, threshold=3, cooldown=60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+    def success(self):
+        self.failures = 0
+
+    def failure(self, status):
+        if not counts_against_key(status):
+            return
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.failures = 0
+            self.ejected_until = time.monotonic() + self.cooldown
+            self.ejections += 1
+
+    def available(self):
+        return time.monotonic() >= self.ejected_until
+
+    def stats(self):
+        return {
+            "available": self.available(),
+            "ejected_for_s": round(max(0.0, self.ejected_until - time.monotonic()), 1),
+            "consecutive_failures": self.failures,
+            "ejections": self.ejections,
+        }
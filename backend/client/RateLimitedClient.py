@@ -0,0 +1,85 @@
+import metrics
+
+RETRY_STATUS = 429
+
+
+def status_code(exc):
+    return getattr(exc, "status_code", None)
+
+
+def retry_after(exc):
+    """
+    Seconds from a 429's Retry-After header, if the SDK exposed one.
+    """
+    headers = getattr(exc, "headers", None) or {}
+    value = {key.lower(): val for key, val in headers.items()}.get("retry-after")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitedClient:
+    """
+    Wraps a cohere.ClientV2 so every chat call waits for the key's RateLimiter
+    and retries 429s with jittered backoff. Outcomes are reported to the key's KeyHealth, if given.
+    Everything other than chat is passed through to the wrapped client.
+    """
+
+    def __init__(self, co, limiter, max_retries=5, health=None):
+        self.co = co
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.health = health
+
+    def record(self, status=None, ok=False):
+        if self.health is None:
+            return
+        if ok:
+            self.health.success()
+        else:
+            self.health.failure(status)
+
+    def __getattr__(self, name):
+        return getattr(self.co, name)
+
+    def chat(self, **kwargs):
+        model = kwargs.get("model")
+        for attempt in range(self.max_retries + 1):
+            metrics.RATE_LIMIT_WAIT.observe(self.limiter.acquire())
+            try:
+                response = self.co.chat(**kwargs)
+                metrics.record_response(model, response)
+                self.record(ok=True)
+                return response
+            except Exception as e:
+                metrics.record_error(model, status_code(e))
+                self.record(status_code(e))
+                if status_code(e) != RETRY_STATUS or attempt == self.max_retries:
+                    raise
+                delay = self.limiter.backoff(attempt, retry_after(e))
+                # the next acquire waits out the backoff, along with everyone else on this key
+                self.limiter.throttle(delay)
+
+
+class AsyncRateLimitedClient(RateLimitedClient):
+    """
+    RateLimitedClient for cohere.AsyncClientV2.
+    """
+
+    async def chat(self, **kwargs):
+        model = kwargs.get("model")
+        for attempt in range(self.max_retries + 1):
+            metrics.RATE_LIMIT_WAIT.observe(await self.limiter.aacquire())
+            try:
+                response = await self.co.chat(**kwargs)
+                metrics.record_response(model, response)
+                self.record(ok=True)
+                return response
+            except Exception as e:
+                metrics.record_error(model, status_code(e))
+                self.record(status_code(e))
+                if status_code(e) != RETRY_STATUS or attempt == self.max_retries:
+                    raise
+                delay = self.limiter.backoff(attempt, retry_after(e))
+                self.limiter.throttle(delay)
@@ -0,0 +1,129 @@
+import asyncio
+import random
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every co.chat call made with one API key.
+    Each caller reserves the next free slot under a lock, so callers are served in arrival
+    order and wait for their slot instead of failing.
+    """
+
+    def __init__(self, limit, period=60.0, burst=1):
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.waiting = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.last_wait = 0.0
+        self.throttled = 0
+        self.retries = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _reserve(self):
+        with self._lock:
+            self._refill()
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate)
+            self.waiting += 1
+            return wait
+
+    def _release(self, wait, cancelled=False):
+        with self._lock:
+            self.waiting -= 1
+            if cancelled:
+                # hand the slot back so callers queued behind us move up
+                self.tokens += 1
+                return
+            self.acquired += 1
+            self.total_wait += wait
+            self.last_wait = wait
+
+    def acquire(self):
+        wait = self._reserve()
+        try:
+            if wait:
+                time.sleep(wait)
+        except BaseException:
+            self._release(wait, cancelled=True)
+            raise
+        self._release(wait)
+        return wait
+
+    async def aacquire(self):
+        wait = self._reserve()
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._release(wait, cancelled=True)
+            raise
+        self._release(wait)
+        return wait
+
+    def try_acquire(self):
+        """
+        Takes a whole token if one is free right now, without waiting or queueing. Returns whether it did.
+        """
+        with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            self.acquired += 1
+            self.last_wait = 0.0
+            return True
+
+    def queue_wait(self):
+        """
+        Seconds a call made now would wait for its slot: it needs a whole token, so a key
+        at 0 tokens still waits 1 / rate.
+        """
+        with self._lock:
+            self._refill()
+            return max(0.0, (1 - self.tokens) / self.rate)
+
+    def throttle(self, seconds):
+        """
+        Called after a 429: pushes every queued slot back so the whole key backs off together.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+            self.throttled += 1
+
+    def backoff(self, attempt, retry_after=None, base=1.0, cap=60.0):
+        """
+        Seconds to sleep before retry number attempt, with full jitter.
+        """
+        self.retries += 1
+        if retry_after is not None:
+            return retry_after + random.uniform(0, base)
+        return random.uniform(0, min(cap, base * 2**attempt))
+
+    def stats(self):
+        with self._lock:
+            self._refill()
+            return {
+                "limit": self.limit,
+                "period_s": self.period,
+                "queue_depth": self.waiting,
+                "queue_wait_s": round(max(0.0, (1 - self.tokens) / self.rate), 3),
+                "last_wait_s": round(self.last_wait, 3),
+                "mean_wait_s": round(self.total_wait / self.acquired, 3) if self.acquired else 0.0,
+                "acquired": self.acquired,
+                "throttled": self.throttled,
+                "retries": self.retries,
+            }
@@ -0,0 +1,7 @@
+from .HedgedClient import AsyncHedgedClient
+from .KeyHealth import KeyHealth
+from .RateLimiter import RateLimiter
+from .RateLimitedClient import RateLimitedClient, AsyncRateLimitedClient
+from .ResponseCache import ResponseCache
+from .CachedClient import CachedClient, AsyncCachedClient
+from .factory import build_clients, enabled, open_cache
@@ -0,0 +1,74 @@
+from .CachedClient import AsyncCachedClient, CachedClient
+from .HedgedClient import AsyncHedgedClient
+from .RateLimitedClient import AsyncRateLimitedClient, RateLimitedClient
+from .ResponseCache import ResponseCache
+
+
+def enabled(value):
+    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def open_cache(config):
+    """
+    Opens the response cache if LLM_CACHE is set in .env; it is off by default.
+        LLM_CACHE_PATH=<sqlite file>, LLM_CACHE_TTL=<seconds>, LLM_CACHE_MAX_ENTRIES=<n>
+    """
+    if not enabled(config.get("LLM_CACHE")):
+        return None
+    return ResponseCache(
+        config.get("LLM_CACHE_PATH") or ".llm_cache.sqlite",
+        ttl=float(config.get("LLM_CACHE_TTL") or 7 * 24 * 3600),
+        max_entries=int(config.get("LLM_CACHE_MAX_ENTRIES") or 10000),
+    )
+
+
+def build_clients(
+    config,
+    limiter,
+    cache=None,
+    generation_models=(),
+    httpx_client=None,
+    async_httpx_client=None,
+    upstream=None,
+    api_key=None,
+    health=None,
+):
+    """
+    Builds the sync and async Cohere clients used by the generators, formatters and judges:
+    rate limited on the key's budget, and cached when a cache is given.
+    Generation calls bypass the cache unless LLM_CACHE_GENERATION is set, and LLM_CACHE_BYPASS=1
+    sends every call upstream without reading or writing the cache.
+    HEDGE=1 duplicates async calls that run past their model's p95 latency (see AsyncHedgedClient).
+    api_key defaults to COHERE_KEY, and health is the key's KeyHealth, if it is part of a pool.
+    upstream is an optional (sync, async) pair of chat clients to wrap instead of Cohere's,
+    such as the offline fake in benchmarks/fake_cohere.py.
+    """
+    api_key = api_key or config.get("COHERE_KEY")
+    if upstream is None:
+        import cohere  # deferred: the SDK is the slowest import on a cold start
+
+        upstream = (
+            cohere.ClientV2(
+                api_key,
+                httpx_client=httpx_client,
+                log_warning_experimental_features=False,
+            ),
+            cohere.AsyncClientV2(
+                api_key,
+                httpx_client=async_httpx_client,
+                log_warning_experimental_features=False,
+            ),
+        )
+    co = RateLimitedClient(upstream[0], limiter, health=health)
+    async_upstream = upstream[1]
+    if enabled(config.get("HEDGE")):
+        async_upstream = AsyncHedgedClient(
+            async_upstream, limiter, min_samples=int(config.get("HEDGE_MIN_SAMPLES") or 20)
+        )
+    aco = AsyncRateLimitedClient(async_upstream, limiter, health=health)
+    if cache is not None:
+        bypass_models = () if enabled(config.get("LLM_CACHE_GENERATION")) else generation_models
+        bypass = enabled(config.get("LLM_CACHE_BYPASS"))
+        co = CachedClient(co, cache, bypass_models, bypass)
+        aco = AsyncCachedClient(aco, cache, bypass_models, bypass)
+    return co, aco
@@ -0,0 +1,160 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from array import array
+
+from store import question_text
+
+# words, numbers and LaTeX commands; punctuation and delimiters are ignored
+TOKEN = re.compile(r"\\[a-z]+|[a-z0-9]+")
+# values are kept to 32 bits so a signature is a compact array("I")
+VALUE_MASK = 0xFFFFFFFF
+
+
+class DuplicateQuestionError(Exception):
+    pass
+
+
+def shingles(text, size=3):
+    """
+    The set of size-word shingles of text, lowercased and stripped of punctuation.
+    """
+    tokens = TOKEN.findall(text.lower())
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def signature(text, bins=64):
+    """
+    One-permutation MinHash: each shingle's 64-bit hash picks a bin by its low bits and the bin
+    keeps the smallest remaining value. Empty bins borrow from the next filled bin (rotation
+    densification), so short texts still give comparable signatures. Returns None for text with no words.
+    """
+    mins = [None] * bins
+    for shingle in shingles(text):
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        b, value = h % bins, (h // bins) & VALUE_MASK
+        if mins[b] is None or value < mins[b]:
+            mins[b] = value
+    if all(value is None for value in mins):
+        return None
+    for b in range(bins):
+        offset = 1
+        while mins[b] is None:
+            borrowed = mins[(b + offset) % bins]
+            if borrowed is not None:
+                mins[b] = (borrowed + offset * 0x9E3779B1) & VALUE_MASK
+            offset += 1
+    return array("I", mins)
+
+
+def similarity(a, b):
+    """
+    Estimated Jaccard similarity of the shingle sets behind two signatures.
+    """
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class DuplicateIndex:
+    """
+    MinHash/LSH index over the text of stored questions, used to reject near-duplicate
+    generations before any judge call is spent on them.
+
+    Signatures are split into bands of rows values; two questions become candidates when any band
+    matches exactly, and candidates are confirmed on the full signature. With 16 bands of 4 rows a
+    pair at 0.8 similarity is found with probability above 0.999, while a lookup stays a handful of
+    dict probes. Signatures are appended to a SQLite file as questions are added and reloaded at start.
+    """
+
+    def __init__(self, path, threshold=0.8, bins=64, bands=16):
+        if bins % bands:
+            raise ValueError("bins must be a multiple of bands")
+        self.path = str(path)
+        self.threshold = threshold
+        self.bins = bins
+        self.bands = bands
+        self.rows = bins // bands
+        self.ids = []
+        self.subjects = []
+        self.signatures = []
+        self.buckets = [{} for _ in range(bands)]
+        self.checks = 0
+        self.duplicates = 0
+        self.lookup_seconds = 0.0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS signatures "
+            "(seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL, subject TEXT NOT NULL, signature BLOB NOT NULL)"
+        )
+        self._db.commit()
+        for id, subject, blob in self._db.execute("SELECT id, subject, signature FROM signatures ORDER BY seq"):
+            sig = array("I")
+            sig.frombytes(blob)
+            if len(sig) == bins:  # skip signatures written with different settings
+                self._insert(id, subject, sig)
+
+    def band_keys(self, sig):
+        rows = self.rows
+        return [hash(sig[band * rows : (band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def _insert(self, id, subject, sig):
+        position = len(self.ids)
+        self.ids.append(id)
+        self.subjects.append(subject)
+        self.signatures.append(sig)
+        for bucket, key in zip(self.buckets, self.band_keys(sig)):
+            bucket.setdefault(key, []).append(position)
+
+    def find(self, question, subject):
+        """
+        Returns (id, similarity) of the most similar stored question of the same subject at or
+        above the threshold, or None.
+        """
+        start = time.perf_counter()
+        sig = signature(question_text(question), self.bins)
+        if sig is None:
+            return None
+        best = None
+        with self._lock:
+            seen = set()
+            for bucket, key in zip(self.buckets, self.band_keys(sig)):
+                for position in bucket.get(key, ()):
+                    if position in seen or self.subjects[position] != subject:
+                        continue
+                    seen.add(position)
+                    score = similarity(sig, self.signatures[position])
+                    if score >= self.threshold and (best is None or score > best[1]):
+                        best = (self.ids[position], score)
+            self.checks += 1
+            self.duplicates += best is not None
+            self.lookup_seconds += time.perf_counter() - start
+        return best
+
+    def add(self, question, subject):
+        sig = signature(question_text(question), self.bins)
+        if sig is None:
+            return
+        with self._lock:
+            self._insert(question["id"], subject, sig)
+            self._db.execute(
+                "INSERT INTO signatures (id, subject, signature) VALUES (?, ?, ?)",
+                (question["id"], subject, sig.tobytes()),
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self):
+        return {
+            "indexed": len(self.ids),
+            "threshold": self.threshold,
+            "checks": self.checks,
+            "duplicates": self.duplicates,
+            "mean_lookup_ms": round(self.lookup_seconds / self.checks * 1000, 3) if self.checks else 0.0,
+        }
@@ -0,0 +1,239 @@
+"""
+Streams stored questions out as JSONL, or as a LaTeX exam paper and a separate markscheme.
+
+    python export.py --format paper --subject math --level HL --out paper.tex
+    python export.py --format markscheme --subject math --level HL --out markscheme.tex
+    python export.py --format jsonl --min-score 90 > questions.jsonl
+
+The store is read a page at a time and each page is written out before the next is read, so
+memory stays flat however many questions are exported; GET /export streams the same chunks.
+Math content and markschemes are already LaTeX and are embedded as they are. CS text is escaped,
+and pseudocode lines are set in verbatim blocks.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from pathlib import Path
+
+FORMATS = {
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "paper": ("application/x-tex", "tex"),
+    "markscheme": ("application/x-tex", "tex"),
+}
+PAGE_SIZE = 100
+
+PREAMBLE = r"""\documentclass[11pt]{article}
+\usepackage[margin=2.5cm]{geometry}
+\usepackage{amsmath,amssymb}
+\setlength{\parindent}{0pt}
+\renewcommand{\labelenumii}{(\alph{enumii})}
+\begin{document}
+"""
+
+LATEX_SPECIALS = {
+    "\\": r"\textbackslash{}",
+    "{": r"\{",
+    "}": r"\}",
+    "$": r"\$",
+    "&": r"\&",
+    "#": r"\#",
+    "^": r"\^{}",
+    "_": r"\_",
+    "~": r"\textasciitilde{}",
+    "%": r"\%",
+}
+LATEX_SPECIAL = re.compile("|".join(re.escape(char) for char in LATEX_SPECIALS))
+# IB pseudocode: indented lines, lowercase keywords, UPPERCASE assignments and lines that are only
+# a call such as MYSTERY(X); a call inside a sentence ("the output of MYSTERY(5)") stays prose
+PSEUDOCODE = re.compile(
+    r"^(\s{2,}|\t)\S"
+    r"|^\s*(loop|end loop|if|end if|else|output|input|return|while|until|for|procedure|function|end)\b"
+    r"|^\s*[A-Z][A-Z0-9_]*(\[.*\])?\s*(=|←)"
+    r"|^\s*[A-Z][A-Z0-9_]*\(.*\)\s*;?\s*$"
+)
+# text written through JSON twice keeps its line breaks as a literal \n. In math text that is a
+# break unless it starts one of the LaTeX commands formatter/local_json.py protects (\neq, \nabla, ...)
+LITERAL_NEWLINE = re.compile(r"\\n(?!(?:eq|e|abla|ot|otin|u|mid|exists|leq|geq|ewline)(?![a-zA-Z]))")
+UNESCAPED_PERCENT = re.compile(r"(?<!\\)%")
+
+
+def escape(text):
+    return LATEX_SPECIAL.sub(lambda match: LATEX_SPECIALS[match.group()], text)
+
+
+def lines_to_latex(lines):
+    return " \\\\\n".join(lines)
+
+
+def math_latex(text):
+    """
+    Math text is LaTeX already; only line breaks and stray % signs need handling.
+    """
+    text = UNESCAPED_PERCENT.sub(r"\\%", LITERAL_NEWLINE.sub("\n", text))
+    return lines_to_latex([line.strip() for line in text.splitlines() if line.strip()])
+
+
+def cs_latex(text):
+    """
+    Escapes CS prose and puts runs of pseudocode lines in verbatim blocks.
+    Every literal \\n is taken as a line break here; CS text has no LaTeX commands to protect.
+    """
+    blocks, prose, code = [], [], []
+
+    def flush_prose():
+        if prose:
+            blocks.append(lines_to_latex(prose))
+            prose.clear()
+
+    def flush_code():
+        if code:
+            body = "\n".join(code).replace("\\end{verbatim}", "\\end {verbatim}")
+            blocks.append("\\begin{verbatim}\n" + body + "\n\\end{verbatim}")
+            code.clear()
+
+    for line in text.replace("\\n", "\n").expandtabs(4).splitlines():
+        if not line.strip():
+            flush_prose()
+            flush_code()
+        elif PSEUDOCODE.search(line):
+            flush_prose()
+            code.append(line.rstrip())
+        else:
+            flush_code()
+            prose.append(escape(line.strip()))
+    flush_prose()
+    flush_code()
+    return "\n\n".join(blocks)
+
+
+def question_latex(number, entry, markscheme=False):
+    question = entry["question"]
+    to_latex = math_latex if entry["subject"] == "math" else cs_latex
+    heading = " --- ".join(escape(str(value)) for value in (entry.get("topic"), entry.get("level")) if value)
+    marks = entry.get("marks")
+
+    lines = [f"% question {number}: {entry['id']}", f"\\item \\textbf{{{heading}}}"]
+    if marks:
+        lines[-1] += f" \\hfill [{marks} marks]"
+    if question.get("question"):
+        lines.append("")
+        lines.append(to_latex(question["question"]))
+    parts = sorted(question.get("parts") or [], key=lambda part: part.get("order") or 0)
+    if parts:  # an empty enumerate does not compile
+        lines.append("\\begin{enumerate}")
+        for part in parts:
+            text = part.get("markscheme") if markscheme else part.get("content")
+            item = "\\item " + (to_latex(text) if isinstance(text, str) and text.strip() else "")
+            if isinstance(part.get("marks"), int):
+                item += f" \\hfill [{part['marks']}]"
+            lines.append(item)
+        lines.append("\\end{enumerate}")
+    return "\n".join(lines) + "\n\n"
+
+
+def title_of(format, filters):
+    described = ", ".join(f"{key} {value}" for key, value in filters.items() if value not in (None, ""))
+    name = "Markscheme" if format == "markscheme" else "Questions"
+    return f"{name} ({escape(described)})" if described else name
+
+
+def header(format, filters):
+    if format == "jsonl":
+        return ""
+    return PREAMBLE + f"\\section*{{{title_of(format, filters)}}}\n\\begin{{enumerate}}\n\n"
+
+
+def chunk(format, entries, first_number):
+    if format == "jsonl":
+        return "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    return "".join(
+        question_latex(number, entry, markscheme=format == "markscheme")
+        for number, entry in enumerate(entries, first_number)
+    )
+
+
+def footer(format):
+    return "" if format == "jsonl" else "\\end{enumerate}\n\\end{document}\n"
+
+
+def pages(store, filters, limit=None, page_size=PAGE_SIZE):
+    """
+    Yields lists of stored entries matching filters (QuestionStore.query keyword arguments),
+    newest first, at most page_size at a time and at most limit in total.
+    """
+    cursor, remaining = None, limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        entries, cursor = store.query(**filters, limit=size, cursor=cursor)
+        if entries:
+            yield entries
+        if remaining is not None:
+            remaining -= len(entries)
+        if cursor is None:
+            return
+
+
+def export(store, format, filters, limit=None, page_size=PAGE_SIZE):
+    """
+    The export as a sequence of text chunks, one per page of questions.
+    """
+    yield header(format, filters)
+    number = 1
+    for entries in pages(store, filters, limit, page_size):
+        yield chunk(format, entries, number)
+        number += len(entries)
+    yield footer(format)
+
+
+async def aexport(store, format, filters, limit=None, page_size=PAGE_SIZE):
+    """
+    Async version of export: each page is read in a worker thread so the event loop stays free.
+    """
+    yield header(format, filters)
+    rows = pages(store, filters, limit, page_size)
+    number = 1
+    while (entries := await asyncio.to_thread(next, rows, None)) is not None:
+        yield chunk(format, entries, number)
+        number += len(entries)
+    yield footer(format)
+
+
+if __name__ == "__main__":
+    from dotenv import dotenv_values
+
+    from store import QuestionStore
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--format", choices=sorted(FORMATS), default="jsonl")
+    parser.add_argument("--out", help="output file (defaults to stdout)")
+    parser.add_argument("--store", help="question store (defaults to QUESTION_STORE_PATH or .questions.sqlite)")
+    parser.add_argument("--subject")
+    parser.add_argument("--topic")
+    parser.add_argument("--subtopic")
+    parser.add_argument("--level")
+    parser.add_argument("--search")
+    parser.add_argument("--min-score", type=float)
+    parser.add_argument("--limit", type=int, help="export at most this many questions")
+    args = parser.parse_args()
+
+    config = dotenv_values(Path(__file__).parent / ".env")
+    store = QuestionStore(args.store or config.get("QUESTION_STORE_PATH") or ".questions.sqlite")
+    filters = {
+        "subject": args.subject,
+        "topic": args.topic,
+        "subtopic": args.subtopic,
+        "level": args.level,
+        "search": args.search,
+        "min_score": args.min_score,
+    }
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for text in export(store, args.format, filters, args.limit):
+            out.write(text)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        store.close()
@@ -1,11 +1,88 @@
 import json
+import time
 import uuid
 
+from . import local_json
+
+
 class BaseFormatter:
 
-    def __init__(self, co, model_id):
+    SCHEMA = None
+
+    def __init__(self, co, model_id, aco=None):
         self.co = co
+        self.aco = aco
         self.model_id = model_id
+        self.json_stats = {"fast_path": 0, "fallback": 0, "local_seconds": 0.0, "fallback_seconds": 0.0}
+
+    def local_defaults(self, topic):
+        """
+        Required fields the LLM formatter would fill in itself when they are missing from the raw output.
+        """
+        return {"topic": topic}
+
+    def parse_local(self, str, topic=None):
+        """
+        Repairs and validates str locally against SCHEMA, so the fix_json LLM call
+        is only made when the raw generation cannot be recovered.
+        """
+        start = time.perf_counter()
+        question = local_json.parse(str, self.SCHEMA, self.local_defaults(topic))
+        self.json_stats["local_seconds"] += time.perf_counter() - start
+        if question is None:
+            return None
+
+        self.json_stats["fast_path"] += 1
+        if topic:
+            question["topic"] = topic
+        return question
+
+    def record_fallback(self, start):
+        self.json_stats["fallback"] += 1
+        self.json_stats["fallback_seconds"] += time.perf_counter() - start
+
+    def stats(self):
+        fast, fallback = self.json_stats["fast_path"], self.json_stats["fallback"]
+        total = fast + fallback
+        mean_fallback = self.json_stats["fallback_seconds"] / fallback if fallback else 0.0
+        return {
+            **self.json_stats,
+            "calls_saved_per_question": round(fast / total, 3) if total else 0.0,
+            # estimated from the mean latency of the LLM calls we did make
+            "seconds_saved_per_question": round(fast * mean_fallback / total, 3) if total else 0.0,
+        }
+
+    def fix_json_request(self, str):
+        """
+        Returns the co.chat keyword arguments that reformat a raw generation into JSON.
+        """
+        raise NotImplementedError
+
+    def fix_json(self, str, topic=None):
+        question = self.parse_local(str, topic)
+        if question is not None:
+            return question
+
+        start = time.perf_counter()
+        response = self.co.chat(**self.fix_json_request(str))
+        self.record_fallback(start)
+        return self.parse_response(response, topic)
+
+    async def afix_json(self, str, topic=None):
+        question = self.parse_local(str, topic)
+        if question is not None:
+            return question
+
+        start = time.perf_counter()
+        response = await self.aco.chat(**self.fix_json_request(str))
+        self.record_fallback(start)
+        return self.parse_response(response, topic)
+
+    def parse_response(self, response, topic=None):
+        response_json = json.loads(response.message.content[0].text)
+        if topic:
+            response_json["topic"] = topic
+        return response_json
 
     def finalize_json(self, question_json):
         question_json["id"] = str(uuid.uuid4())
@@ -1,15 +1,42 @@
-import json
 from .BaseFormatter import BaseFormatter
 
 
 class CSFormatter(BaseFormatter):
 
-    def __init__(self, co, model_id):
-        self.co = co
-        self.model_id = model_id
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "question": {"type": "string"},
+            "parts": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "content": {"type": "string"},
+                        "marks": {"type": "integer"},
+                        "markscheme": {"type": "string"},
+                        "subtopics": {"type": "array", "items": {"type": "string"}},
+                        "order": {"type": "integer"},
+                    },
+                    "required": [
+                        "content",
+                        "marks",
+                        "markscheme",
+                        "subtopics",
+                        "order",
+                    ],
+                },
+            },
+        },
+        "required": ["question", "parts"],
+    }
+
+    def local_defaults(self, topic):
+        # the prompt below tells the model to leave a missing field empty
+        return {"question": ""}
 
-    def fix_json(self, str, topic=None):
-        response = self.co.chat(
+    def fix_json_request(self, str):
+        return dict(
             model=self.model_id,
             messages=[
                 {
@@ -39,36 +66,6 @@ class CSFormatter(BaseFormatter):
             ],
             response_format={
                 "type": "json_object",
-                "schema": {
-                    "type": "object",
-                    "properties": {
-                        "question": {"type": "string"},
-                        "parts": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "content": {"type": "string"},
-                                    "marks": {"type": "integer"},
-                                    "markscheme": {"type": "string"},
-                                    "subtopics": {"type": "array", "items": {"type": "string"}},
-                                    "order": {"type": "integer"},
-                                },
-                                "required": [
-                                    "content",
-                                    "marks",
-                                    "markscheme",
-                                    "subtopics",
-                                    "order",
-                                ],
-                            },
-                        },
-                    },
-                    "required": ["question", "parts"],
-                },
+                "schema": self.SCHEMA,
             },
         )
-        response_json = json.loads(response.message.content[0].text)
-        if topic:
-            response_json["topic"] = topic
-        return response_json
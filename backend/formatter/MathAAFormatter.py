@@ -1,11 +1,38 @@
 from .BaseFormatter import BaseFormatter
-import json
 
 
 class MathAAFormatter(BaseFormatter):
 
-    def fix_json(self, str, topic=None):
-        response = self.co.chat(
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "topic": {"type": "string"},
+            "parts": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "content": {"type": "string"},
+                        "marks": {"type": "integer"},
+                        "markscheme": {"type": "string"},
+                        "subtopics": {"type": "array", "items": {"type": "string"}},
+                        "order": {"type": "integer"},
+                    },
+                    "required": [
+                        "content",
+                        "marks",
+                        "markscheme",
+                        "subtopics",
+                        "order",
+                    ],
+                },
+            },
+        },
+        "required": ["topic", "parts"],
+    }
+
+    def fix_json_request(self, str):
+        return dict(
             model=self.model_id,
             messages=[
                 {
@@ -33,36 +60,6 @@ class MathAAFormatter(BaseFormatter):
             ],
             response_format={
                 "type": "json_object",
-                "schema": {
-                    "type": "object",
-                    "properties": {
-                        "topic": {"type": "string"},
-                        "parts": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "content": {"type": "string"},
-                                    "marks": {"type": "integer"},
-                                    "markscheme": {"type": "string"},
-                                    "subtopics": {"type": "array", "items": {"type": "string"}},
-                                    "order": {"type": "integer"},
-                                },
-                                "required": [
-                                    "content",
-                                    "marks",
-                                    "markscheme",
-                                    "subtopics",
-                                    "order",
-                                ],
-                            },
-                        },
-                    },
-                    "required": ["topic", "parts"],
-                },
+                "schema": self.SCHEMA,
             },
         )
-        response_json = json.loads(response.message.content[0].text)
-        if topic:
-            response_json["topic"] = topic
-        return response_json
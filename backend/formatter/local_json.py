@@ -0,0 +1,161 @@
+import ast
+import json
+import re
+
+FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*\n?(.*?)\n?\s*```\s*$", re.DOTALL)
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+INVALID_ESCAPE = re.compile(r'\\(?!["\\/bfnrtu])')
+FIELD_LINE = re.compile(r"^([A-Za-z_]+):\s?(.*)$")
+# LaTeX commands that start with a JSON escape letter, by that letter. Written with one backslash
+# they parse as a control character plus letters (\neq -> newline "eq", \frac -> form feed "rac")
+LATEX_AFTER_ESCAPE = {
+    "n": r"eq|e|abla|ot|otin|u|mid|exists|leq|geq|ewline",
+    "t": r"imes|ext[a-z]*|heta|anh?|au|o|ilde|riangle|herefore|frac",
+    "f": r"rac|orall",
+    "b": r"eta|inom|ar|ig[a-z]*|egin|oldsymbol|mod|ullet|ot",
+    "r": r"ight[a-z]*|ho|angle|floor|ceil",
+}
+SINGLE_ESCAPED_LATEX = re.compile(
+    r"(?<!\\)\\(?:" + "|".join(f"{letter}(?:{rest})" for letter, rest in LATEX_AFTER_ESCAPE.items()) + r")(?![a-zA-Z])"
+)
+# a parsed string containing these may be single-escaped LaTeX (\frac, \beta, \right, \times, \neq);
+# a newline before "u = x^2" is just as likely a line break, so it is left to the formatter to decide
+SUSPICIOUS_CHARS = re.compile(r"[\f\b\r\t]|\n(?:" + LATEX_AFTER_ESCAPE["n"] + r")(?![a-zA-Z])")
+
+TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+def validate(schema, value):
+    """
+    Checks value against the subset of JSON schema used in response_format
+    (type, properties, required, items). Returns True when it conforms.
+    """
+    expected = schema.get("type")
+    if expected:
+        if expected in ("integer", "number") and isinstance(value, bool):
+            return False
+        if not isinstance(value, TYPES[expected]):
+            return False
+    if isinstance(value, dict):
+        if any(key not in value for key in schema.get("required", [])):
+            return False
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value and not validate(subschema, value[key]):
+                return False
+    if isinstance(value, list) and "items" in schema:
+        return all(validate(schema["items"], item) for item in value)
+    return True
+
+
+def has_suspicious_strings(value):
+    if isinstance(value, str):
+        return bool(SUSPICIOUS_CHARS.search(value))
+    if isinstance(value, dict):
+        return any(has_suspicious_strings(v) for v in value.values())
+    if isinstance(value, list):
+        return any(has_suspicious_strings(v) for v in value)
+    return False
+
+
+def parse_fields(text):
+    """
+    Parses the 'field: value' layout the fine-tuned generators were trained on, e.g.
+        topic: Calculus
+        parts: [{"content": ...}]
+    where each value is either JSON or a plain string.
+    """
+    fields = {}
+    key = None
+    for line in text.splitlines():
+        match = FIELD_LINE.match(line)
+        if match:
+            key = match.group(1)
+            fields[key] = match.group(2)
+        elif key is not None:
+            fields[key] += "\n" + line
+    if not fields:
+        return None
+
+    result = {}
+    for key, raw in fields.items():
+        raw = raw.strip()
+        if raw.startswith(("[", "{")):
+            value = loads(raw)
+            if value is None:
+                return None
+            result[key] = value
+        else:
+            result[key] = raw
+    return result
+
+
+def candidates(text):
+    """
+    Yields progressively more lenient repairs of text.
+    """
+    text = text.strip()
+    fenced = FENCE.match(text)
+    if fenced:
+        text = fenced.group(1).strip()
+    yield text
+
+    # drop prose around the outermost object (or list, for the values of parse_fields)
+    start = min((i for i in (text.find("{"), text.find("[")) if i != -1), default=-1)
+    end = text.rfind("}" if text[start : start + 1] == "{" else "]")
+    if start != -1 and end > start:
+        text = text[start : end + 1]
+        yield text
+
+    text = TRAILING_COMMA.sub(r"\1", text)
+    yield text
+    # only once strict parsing has failed: backslashes before LaTeX commands are doubled
+    text = SINGLE_ESCAPED_LATEX.sub(lambda match: "\\" + match.group(), text)
+    yield INVALID_ESCAPE.sub(r"\\\\", text)
+
+
+def loads(text):
+    """
+    Parses text as JSON, repairing code fences, surrounding prose, trailing commas,
+    unescaped backslashes and single-quoted (Python repr) objects. Returns None if nothing parses.
+    """
+    repairs = list(candidates(text))
+    for candidate in repairs:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            pass
+    # Python literals last: they take escapes JSON rejects (\alpha parses as a bell character and "lpha")
+    for candidate in repairs:
+        try:
+            value = ast.literal_eval(candidate)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            continue
+        if isinstance(value, (dict, list)):
+            return value
+    return None
+
+
+def parse(text, schema, defaults=None):
+    """
+    Returns the object in text if it can be repaired locally and matches schema, else None.
+    defaults fills required keys the caller already knows (e.g. the requested topic).
+    """
+    value = loads(text)
+    if not isinstance(value, dict):
+        value = parse_fields(text)
+    if not isinstance(value, dict):
+        return None
+
+    for key, default in (defaults or {}).items():
+        if default is not None:
+            value.setdefault(key, default)
+    if not validate(schema, value) or has_suspicious_strings(value):
+        return None
+    return value
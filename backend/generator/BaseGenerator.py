@@ -0,0 +1,281 @@
+import asyncio
+
+import metrics
+from dedup import DuplicateQuestionError
+from judge.validators import part_failures
+
+
+class BaseGenerator:
+    subject = None
+    default_topic = None
+    # "whole" judges the question in one call, "parts" judges each part concurrently
+    judge_mode = "whole"
+    # a store.QuestionStore that keeps every finalized question, set by the registry
+    store = None
+    # a dedup.DuplicateIndex that every saved question is added to, set by the registry
+    duplicates = None
+    # whether new generations are checked against duplicates right after fix_json (DEDUP)
+    check_duplicates = True
+    # fresh generations to try when one is a near-duplicate of a stored question
+    duplicate_retries = 2
+    # a judge_policy.JudgePolicy that adapts max_iterations per topic and stage, set by the registry
+    policy = None
+    # seconds allowed for "generate", "fix_json", each judge loop ("judge") and the whole "total";
+    # missing means no limit
+    deadlines = {}
+
+    def generate_question_request(self, topic):
+        """
+        Returns the co.chat keyword arguments for the fine-tuned generation call.
+        """
+        raise NotImplementedError
+
+    def generate_question(self, topic):
+        response = self.co.chat(**self.generate_question_request(topic))
+        return response.message.content[0].text
+
+    async def agenerate_question(self, topic):
+        response = await self.aco.chat(**self.generate_question_request(topic))
+        return response.message.content[0].text
+
+    def judge_stage(self, question, stage, max_iterations, acceptable_score):
+        """
+        One judge loop ("question" or "markscheme"). Local validator failures are sent to the judge
+        for a targeted repair, and a passing score only ends the loop once the checks pass too.
+        """
+        judge = self.judge.judge_question if stage == "question" else self.judge.judge_markscheme
+        issues = self.judge.validate(question, stage)
+        score, iteration = None, -1
+        for iteration in range(max_iterations):
+            with metrics.time_stage(self.subject, f"judge_{stage}", iteration + 1):
+                question, score = judge(question, issues)
+            issues = self.judge.validate(question, stage)
+            metrics.JUDGE_SCORE.labels(self.subject, stage).observe(score)
+
+            if score >= acceptable_score and not issues:
+                break
+        metrics.JUDGE_ITERATIONS.labels(self.subject, stage).observe(iteration + 1)
+        return question, score
+
+    def deadline(self, stage, request_deadline=None):
+        """
+        The event loop time by which stage has to finish: its own deadline, capped by the request's.
+        """
+        seconds = self.deadlines.get(stage)
+        ends = [] if request_deadline is None else [request_deadline]
+        if seconds is not None:
+            ends.append(asyncio.get_running_loop().time() + seconds)
+        return min(ends, default=None)
+
+    def time_left(self, deadline):
+        if deadline is None:
+            return None
+        return max(0.0, deadline - asyncio.get_running_loop().time())
+
+    def iteration_limit(self, topic, stage, max_iterations):
+        if self.policy is None:
+            return max_iterations
+        return self.policy.max_iterations(self.subject, topic, stage, max_iterations)
+
+    def model_ids(self):
+        return {"generator": self.MODEL_ID, "formatter": self.formatter.model_id, "judge": self.judge.model_id}
+
+    def save(self, question, level, scores):
+        if self.store is not None:
+            self.store.add(question, self.subject, level, scores, self.model_ids())
+        if self.duplicates is not None:
+            self.duplicates.add(question, self.subject)
+
+    def find_duplicate(self, question):
+        if self.duplicates is None or not self.check_duplicates:
+            return None
+        return self.duplicates.find(question, self.subject)
+
+    def stored_duplicate(self, match):
+        """
+        Once every retry came back as a near-duplicate, the stored question it repeats is served
+        rather than spending judge calls on another copy.
+        """
+        entry = self.store.get(match[0]) if self.store is not None else None
+        if entry is None:
+            raise DuplicateQuestionError(f"Generated a near-duplicate of question {match[0]} ({match[1]:.2f} similar)")
+        return entry["question"]
+
+    def generate(self, topic=None, level="SL", max_iterations=2, acceptable_score=95):
+        topic = topic or self.default_topic
+
+        for attempt in range(self.duplicate_retries + 1):
+            print("Generating...")
+            with metrics.time_stage(self.subject, "generate"):
+                question_str = self.generate_question(topic)
+            with metrics.time_stage(self.subject, "fix_json"):
+                question = self.formatter.fix_json(question_str, topic)
+            match = self.find_duplicate(question)
+            if match is None:
+                break
+            print(f"Near-duplicate of {match[0]} ({match[1]:.2f} similar)")
+        else:
+            return self.stored_duplicate(match)
+
+        scores = {}
+        for stage in ("question", "markscheme"):
+            print(f"Judging {stage}...")
+            limit = self.iteration_limit(topic, stage, max_iterations)
+            question, score = self.judge_stage(question, stage, limit, acceptable_score)
+            if score is not None:
+                scores[stage] = score
+
+        print("Question finalized")
+        with metrics.time_stage(self.subject, "finalize"):
+            question = self.formatter.finalize_json(question)
+            question["judging_status"] = "complete"
+            self.save(question, level, scores)
+        return question
+
+    async def agenerate_stages(self, topic=None, level="SL", max_iterations=2, acceptable_score=95):
+        """
+        Runs the same pipeline as generate on the async client, yielding an event
+        after each stage so callers can show the draft before judging finishes.
+        Closing the iterator cancels the remaining upstream calls.
+
+        A generate or fix_json stage past its deadline raises TimeoutError, since there is no question
+        yet. A judge loop past its deadline ends judging, and the question is finalized as judged
+        so far with judging_status "timed_out" instead of "complete", and is not saved.
+        """
+        topic = topic or self.default_topic
+        total = self.deadlines.get("total")
+        request_deadline = asyncio.get_running_loop().time() + total if total is not None else None
+
+        for attempt in range(self.duplicate_retries + 1):
+            print("Generating...")
+            with metrics.time_stage(self.subject, "generate"):
+                question_str = await self.within_deadline(
+                    self.agenerate_question(topic), "generate", request_deadline
+                )
+            yield {"stage": "generated", "raw": question_str}
+
+            with metrics.time_stage(self.subject, "fix_json"):
+                question = await self.within_deadline(
+                    self.formatter.afix_json(question_str, topic), "fix_json", request_deadline
+                )
+            match = self.find_duplicate(question)
+            if match is None:
+                break
+            yield {"stage": "duplicate", "attempt": attempt + 1, "match": match[0], "similarity": match[1]}
+        else:
+            yield {"stage": "finalized", "question": self.stored_duplicate(match)}
+            return
+        yield {"stage": "formatted", "question": question}
+
+        scores = {}
+        judging_status = "complete"
+        for stage in ("question", "markscheme"):
+            print(f"Judging {stage}...")
+            limit = self.iteration_limit(topic, stage, max_iterations)
+            deadline = self.deadline("judge", request_deadline)
+            stage_scores, passes = [], []
+            events = self.ajudge_stage(question, stage, limit, acceptable_score)
+            try:
+                while True:
+                    # the judge call in flight is cancelled if the deadline passes
+                    event = await asyncio.wait_for(events.__anext__(), self.time_left(deadline))
+                    question = event["question"]
+                    stage_scores.append(event["score"])
+                    passes.append(event["score"] >= acceptable_score and not event["issues"])
+                    yield event
+            except StopAsyncIteration:
+                pass
+            except asyncio.TimeoutError:
+                judging_status = "timed_out"
+                metrics.STAGE_TIMEOUTS.labels(self.subject, f"judge_{stage}").inc()
+                yield {"stage": "timeout", "during": f"judge_{stage}"}
+            finally:
+                await events.aclose()
+
+            metrics.JUDGE_ITERATIONS.labels(self.subject, stage).observe(len(stage_scores))
+            if stage_scores:
+                scores[stage] = stage_scores[-1]
+            if judging_status != "complete":
+                break
+            if self.policy is not None:
+                self.policy.record(self.subject, topic, stage, stage_scores, passes, limit, max_iterations)
+
+        print("Question finalized")
+        with metrics.time_stage(self.subject, "finalize"):
+            question = self.formatter.finalize_json(question)
+            question["judging_status"] = judging_status
+            # a half-judged question is returned to this caller only, never stored for others
+            if judging_status == "complete":
+                self.save(question, level, scores)
+        yield {"stage": "finalized", "question": question}
+
+    async def within_deadline(self, awaitable, stage, request_deadline=None):
+        try:
+            return await asyncio.wait_for(awaitable, self.time_left(self.deadline(stage, request_deadline)))
+        except asyncio.TimeoutError:
+            metrics.STAGE_TIMEOUTS.labels(self.subject, stage).inc()
+            raise
+
+    def can_judge_parts(self, question):
+        orders = [part.get("order") for part in question.get("parts", [])]
+        return len(orders) > 1 and all(isinstance(order, int) for order in orders) and len(set(orders)) == len(orders)
+
+    async def ajudge_stage(self, question, stage, max_iterations, acceptable_score):
+        """
+        Runs one judge loop ("question" or "markscheme"), yielding an event per iteration.
+        In "parts" mode only the parts still below acceptable_score, or failing a local check,
+        are judged again.
+        """
+        issues = self.judge.validate(question, stage)
+        if self.judge_mode != "parts" or not self.can_judge_parts(question):
+            judge = self.judge.stage_judge(stage)
+            for iteration in range(max_iterations):
+                with metrics.time_stage(self.subject, f"judge_{stage}", iteration + 1):
+                    question, score = await judge(question, issues)
+                issues = self.judge.validate(question, stage)
+                metrics.JUDGE_SCORE.labels(self.subject, stage).observe(score)
+                yield {
+                    "stage": f"judge_{stage}",
+                    "iteration": iteration + 1,
+                    "score": score,
+                    "issues": issues,
+                    "question": question,
+                }
+
+                if score >= acceptable_score and not issues:
+                    break
+            return
+
+        scores = {}
+        pending = None
+        for iteration in range(max_iterations):
+            with metrics.time_stage(self.subject, f"judge_{stage}", iteration + 1):
+                question, new_scores = await self.judge.ajudge_parts(question, stage, pending, issues)
+            scores.update(new_scores)
+            score = self.judge.aggregate_score(question, scores)
+            issues = self.judge.validate(question, stage)
+            metrics.JUDGE_SCORE.labels(self.subject, stage).observe(score)
+            yield {
+                "stage": f"judge_{stage}",
+                "iteration": iteration + 1,
+                "score": score,
+                "part_scores": scores.copy(),
+                "issues": issues,
+                "question": question,
+            }
+
+            pending = {
+                order
+                for order, part_score in scores.items()
+                if part_score < acceptable_score or part_failures(issues, order)
+            }
+            if not pending:
+                break
+
+    async def agenerate(self, topic=None, level="SL", max_iterations=2, acceptable_score=95):
+        """
+        Awaits the whole pipeline, so a request costs a coroutine rather than a threadpool thread.
+        """
+        async for event in self.agenerate_stages(topic, level, max_iterations, acceptable_score):
+            if event["stage"] == "finalized":
+                return event["question"]
@@ -1,24 +1,36 @@
-import cohere
 from dotenv import dotenv_values
+import client
 import formatter
 import judge
+from .BaseGenerator import BaseGenerator
 
 
-class CSGenerator:
-    def __init__(self, env_path=".env"):
-        cs_generator_v1 = "a3c85146-0259-48c3-a7c0-e1ac0824a733-ft"
-        self.model_id = cs_generator_v1
+class CSGenerator(BaseGenerator):
+    subject = "cs"
+    default_topic = "Problem-solving and Programming"
+    MODEL_ID = "a3c85146-0259-48c3-a7c0-e1ac0824a733-ft"  # cs_generator_v1
+    KEY_LIMIT = 10  # chat calls per minute allowed on one API key
+
+    def __init__(self, env_path=".env", co=None, aco=None):
+        self.model_id = self.MODEL_ID
         self.base_model_id = "command-a-03-2025"
 
-        config = dotenv_values(env_path)
-        self.co = cohere.ClientV2(config.get("COHERE_KEY"), log_warning_experimental_features=False)
-        self.KEY_LIMIT = 10
+        if co is None or aco is None:
+            # standalone use (e.g. examples.py); the server shares one client through GeneratorRegistry
+            config = dotenv_values(env_path)
+            limiter = client.RateLimiter(self.KEY_LIMIT)
+            default_co, default_aco = client.build_clients(
+                config, limiter, client.open_cache(config), generation_models=[self.MODEL_ID]
+            )
+            co, aco = co or default_co, aco or default_aco
+        self.co = co
+        self.aco = aco
 
-        self.Formatter = formatter.CSFormatter(self.co, self.base_model_id)
-        self.Judge = judge.CSJudge(self.co, self.base_model_id)
+        self.formatter = formatter.CSFormatter(self.co, self.base_model_id, self.aco)
+        self.judge = judge.CSJudge(self.co, self.base_model_id, self.aco)
 
-    def generate_question(self, topic="Problem-solving and Programming"):
-        response = self.co.chat(
+    def generate_question_request(self, topic="Problem-solving and Programming"):
+        return dict(
             model=self.model_id,
             messages=[
                 {
@@ -62,32 +74,3 @@ class CSGenerator:
             ],
             # response format is not supported for fine-tuned models, so we will enforce json with fix_json
         )
-        return response.message.content[0].text
-
-    def generate(
-        self,
-        topic="Problem-solving and Programming",
-        level="SL",
-        max_iterations=2,
-        acceptable_score=95,
-    ):
-        print("Generating...")
-        question_str = self.generate_question(topic)
-        question = self.Formatter.fix_json(question_str, topic)
-
-        print(f"Judging question...")
-        for _ in range(max_iterations):
-            question, score = self.Judge.judge_question(question)
-
-            if score >= acceptable_score:
-                break
-
-        print(f"Judging markscheme...")
-        for _ in range(max_iterations):
-            question, score = self.Judge.judge_markscheme(question)
-
-            if score >= acceptable_score:
-                break
-
-        print("Question finalized")
-        return self.Formatter.finalize_json(question)
@@ -1,24 +1,36 @@
-import cohere
 from dotenv import dotenv_values
+import client
 import formatter
 import judge
+from .BaseGenerator import BaseGenerator
 
 
-class MathAAGenerator:
-    def __init__(self, env_path=".env"):
-        math_aa_generator_v2 = "e89238d1-6894-48a0-944c-011fd837df78-ft"
-        self.model_id = math_aa_generator_v2
+class MathAAGenerator(BaseGenerator):
+    subject = "math"
+    default_topic = "Calculus"
+    MODEL_ID = "e89238d1-6894-48a0-944c-011fd837df78-ft"  # math_aa_generator_v2
+    KEY_LIMIT = 10  # chat calls per minute allowed on one API key
+
+    def __init__(self, env_path=".env", co=None, aco=None):
+        self.model_id = self.MODEL_ID
         self.base_model_id = "command-a-03-2025"
 
-        config = dotenv_values(env_path)
-        self.co = cohere.ClientV2(config.get("COHERE_KEY"), log_warning_experimental_features=False)
-        self.KEY_LIMIT = 10
+        if co is None or aco is None:
+            # standalone use (e.g. examples.py); the server shares one client through GeneratorRegistry
+            config = dotenv_values(env_path)
+            limiter = client.RateLimiter(self.KEY_LIMIT)
+            default_co, default_aco = client.build_clients(
+                config, limiter, client.open_cache(config), generation_models=[self.MODEL_ID]
+            )
+            co, aco = co or default_co, aco or default_aco
+        self.co = co
+        self.aco = aco
 
-        self.formatter = formatter.MathAAFormatter(self.co, self.base_model_id)
-        self.judge = judge.AAMathJudge(self.co, self.base_model_id)
+        self.formatter = formatter.MathAAFormatter(self.co, self.base_model_id, self.aco)
+        self.judge = judge.AAMathJudge(self.co, self.base_model_id, self.aco)
 
-    def generate_question(self, topic="Number and Algebra"):
-        response = self.co.chat(
+    def generate_question_request(self, topic="Number and Algebra"):
+        return dict(
             model=self.model_id,
             messages=[
                 {
@@ -65,26 +77,3 @@ class MathAAGenerator:
             ],
             # response format is not supported for fine-tuned models, so we will enforce json with fix_json
         )
-        return response.message.content[0].text
-
-    def generate(self, topic="Calculus", level="SL", max_iterations=2, acceptable_score=95):
-        print("Generating...")
-        question_str = self.generate_question(topic)
-        question = self.formatter.fix_json(question_str, topic)
-
-        print(f"Judging question...")
-        for _ in range(max_iterations):
-            question, score = self.judge.judge_question(question)
-
-            if score >= acceptable_score:
-                break
-
-        print(f"Judging markscheme...")
-        for _ in range(max_iterations):
-            question, score = self.judge.judge_markscheme(question)
-
-            if score >= acceptable_score:
-                break
-
-        print("Question finalized")
-        return self.formatter.finalize_json(question)
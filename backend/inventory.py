@@ -0,0 +1,110 @@
+import asyncio
+from collections import deque
+
+from models import GenerateCSRequest, GenerateMathRequest
+
+DEFAULT_REQUESTS = {
+    "math": GenerateMathRequest(),
+    "cs": GenerateCSRequest(),
+}
+
+
+class QuestionInventory:
+    """
+    Keeps a stock of finished questions for each (subject, topic, level) key so /generate/*
+    can answer instantly. A background warmer refills the emptiest key one question at a time,
+    and only while an API key has no queue, so live requests keep priority on the keys.
+
+    Configured from .env:
+        INVENTORY_STOCK=<questions to keep per key, 0 disables the warmer>
+        INVENTORY_TOPICS_MATH=<comma separated topics>  (defaults to GenerateMathRequest's topic)
+        INVENTORY_TOPICS_CS=<comma separated topics>    (defaults to GenerateCSRequest's topic)
+        INVENTORY_LEVELS=<comma separated levels>       (defaults to the request's level)
+    """
+
+    def __init__(self, registry, idle_interval=5.0, error_interval=30.0):
+        self.registry = registry
+        self.idle_interval = idle_interval
+        self.error_interval = error_interval
+        self.stock = {}
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.errors = 0
+        self._task = None
+
+    def target(self):
+        return int(self.registry.config.get("INVENTORY_STOCK") or 0)
+
+    def keys(self):
+        config = self.registry.config
+        keys = []
+        for subject, defaults in DEFAULT_REQUESTS.items():
+            topics = config.get(f"INVENTORY_TOPICS_{subject.upper()}") or defaults.topic
+            levels = config.get("INVENTORY_LEVELS") or defaults.level
+            for topic in topics.split(","):
+                for level in levels.split(","):
+                    keys.append((subject, topic.strip(), level.strip()))
+        return keys
+
+    def take(self, subject, topic, level):
+        """
+        Removes and returns a stocked question, or None if the key is empty.
+        """
+        stock = self.stock.get((subject, topic, level))
+        if stock:
+            self.hits += 1
+            return stock.popleft()
+        self.misses += 1
+        return None
+
+    def most_needed(self):
+        target = self.target()
+        needed = [key for key in self.keys() if len(self.stock.get(key, ())) < target]
+        return min(needed, key=lambda key: len(self.stock.get(key, ())), default=None)
+
+    async def refill(self, key):
+        subject, topic, level = key
+        question = await self.registry.get(subject).agenerate(topic=topic, level=level)
+        if question.get("judging_status", "complete") != "complete":
+            return
+        self.stock.setdefault(key, deque()).append(question)
+        self.generated += 1
+
+    async def run(self):
+        while True:
+            key = self.most_needed()
+            if key is None or not self.registry.idle():
+                await asyncio.sleep(self.idle_interval)
+                continue
+            try:
+                await self.refill(key)
+            except Exception as e:
+                self.errors += 1
+                print(f"Inventory refill failed for {key}: {e}")
+                await asyncio.sleep(self.error_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        served = self.hits + self.misses
+        return {
+            "target": self.target(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / served, 3) if served else 0.0,
+            "generated": self.generated,
+            "errors": self.errors,
+            "stock": {"/".join(key): len(self.stock.get(key, ())) for key in self.keys()},
+        }
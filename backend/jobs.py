@@ -0,0 +1,139 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+COLUMNS = "id, subject, topic, level, status, stage, result, error, created, started, finished"
+
+
+class JobQueue:
+    """
+    Runs generations as background jobs so a client can submit a question and poll for it,
+    rather than holding a connection open for the whole pipeline.
+
+    Jobs are kept in SQLite. A fixed pool of workers drains them oldest first, and the shared rate
+    limiter paces their upstream calls, so a long queue waits on the key rather than failing.
+    Jobs still queued or running when the server stopped are picked up again on start.
+
+    Configured from .env:
+        JOBS_PATH=<sqlite file>         (defaults to .jobs.sqlite)
+        JOBS_WORKERS=<concurrent jobs>  (defaults to 2)
+    """
+
+    def __init__(self, registry, inventory=None, path=".jobs.sqlite", workers=2):
+        self.registry = registry
+        self.inventory = inventory
+        self.path = str(path)
+        self.workers = workers
+        self.queue = asyncio.Queue()
+        self._tasks = []
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, subject TEXT NOT NULL, topic TEXT, level TEXT NOT NULL, "
+            "status TEXT NOT NULL, stage TEXT, result TEXT, error TEXT, "
+            "created REAL NOT NULL, started REAL, finished REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        self._db.commit()
+
+    def _update(self, id, **fields):
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), id))
+            self._db.commit()
+
+    def submit(self, subject, topic=None, level="SL"):
+        """
+        Queues a generation and returns its job id.
+        """
+        id = str(uuid.uuid4())
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, subject, topic, level, status, created) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (id, subject, topic, level, time.time()),
+            )
+            self._db.commit()
+        self.queue.put_nowait(id)
+        return id
+
+    def get(self, id):
+        with self._lock:
+            row = self._db.execute(f"SELECT {COLUMNS} FROM jobs WHERE id = ?", (id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(COLUMNS.split(", "), row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    async def run_job(self, id):
+        job = self.get(id)
+        if job is None or job["status"] not in ("queued", "running"):
+            return
+        subject, topic, level = job["subject"], job["topic"], job["level"]
+        self._update(id, status="running", stage=None, started=time.time())
+
+        generator = self.registry.get(subject)
+        question = None
+        if self.inventory is not None:
+            question = self.inventory.take(subject, topic or generator.default_topic, level)
+        if question is None:
+            async for event in generator.agenerate_stages(topic=topic, level=level):
+                self._update(id, stage=event["stage"])
+                if event["stage"] == "finalized":
+                    question = event["question"]
+        self._update(id, status="done", stage="finalized", result=json.dumps(question), finished=time.time())
+
+    async def worker(self):
+        while True:
+            id = await self.queue.get()
+            try:
+                await self.run_job(id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._update(id, status="failed", error=f"{type(e).__name__}: {e}", finished=time.time())
+            finally:
+                self.queue.task_done()
+
+    def start(self):
+        if self._tasks:
+            return
+        with self._lock:
+            # jobs interrupted by a restart go back to the front of the queue
+            pending = self._db.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created"
+            ).fetchall()
+        for (id,) in pending:
+            self.queue.put_nowait(id)
+        self._tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        with self._lock:
+            self._db.close()
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            (oldest,) = self._db.execute("SELECT MIN(created) FROM jobs WHERE status = 'queued'").fetchone()
+            (mean_wait,) = self._db.execute(
+                "SELECT AVG(started - created) FROM jobs WHERE started IS NOT NULL AND started > ?", (now - 3600,)
+            ).fetchone()
+        return {
+            "workers": self.workers,
+            "queue_depth": counts.get("queued", 0),
+            "oldest_queued_age_s": round(now - oldest, 1) if oldest is not None else 0.0,
+            # how long jobs started in the last hour sat in the queue
+            "mean_queue_wait_s": round(mean_wait, 1) if mean_wait is not None else 0.0,
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+        }
@@ -0,0 +1,151 @@
+import asyncio
+import json
+
+from .validators import part_failures
+
+PATCH_INSTRUCTIONS = """
+    Do NOT repeat the whole question. Output only what you change, as:
+    {
+        "parts": [
+            {"order": int, ...only the fields of this part you changed...},
+            ...
+        ],
+        "score": int
+    }
+    Leave out parts you do not change, and use an empty 'parts' list if nothing changes.
+    """
+
+PATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "parts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "order": {"type": "integer"},
+                    "content": {"type": "string"},
+                    "marks": {"type": "integer"},
+                    "markscheme": {"type": "string"},
+                    "subtopics": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["order"],
+            },
+        },
+        "score": {"type": "integer"},
+    },
+    "required": ["parts", "score"],
+}
+
+
+class BaseJudge:
+    def __init__(self, co, model_id, aco=None, patch=False):
+        self.co = co
+        self.aco = aco
+        self.model_id = model_id
+        # when set, the judge returns only changed fields per part, which are merged locally
+        self.patch = patch
+
+    def serialize(self, question):
+        return json.dumps(question, separators=(",", ":"), ensure_ascii=False)
+
+    def judge_question_request(self, question):
+        raise NotImplementedError
+
+    def judge_markscheme_request(self, question):
+        raise NotImplementedError
+
+    def validate(self, question, stage):
+        """
+        Local checks for the given stage ("question" or "markscheme"); returns a list of failures.
+        """
+        return []
+
+    def prepare(self, request, issues=None):
+        """
+        Appends the failed local checks to the user message so the judge repairs them specifically,
+        and switches the requested output to a patch in patch mode.
+        """
+        if issues:
+            problems = "\n".join(f"- {issue}" for issue in issues)
+            message = request["messages"][-1]
+            message["content"] += f"\n\nAutomated checks found these problems, fix them:\n{problems}"
+        if self.patch:
+            request["messages"][0]["content"] += PATCH_INSTRUCTIONS
+            request["response_format"] = {"type": "json_object", "schema": PATCH_SCHEMA}
+        return request
+
+    def judge_question(self, question, issues=None):
+        response = self.co.chat(**self.prepare(self.judge_question_request(question), issues))
+        return self.parse_response(response, question)
+
+    def judge_markscheme(self, question, issues=None):
+        response = self.co.chat(**self.prepare(self.judge_markscheme_request(question), issues))
+        return self.parse_response(response, question)
+
+    async def ajudge_question(self, question, issues=None):
+        response = await self.aco.chat(**self.prepare(self.judge_question_request(question), issues))
+        return self.parse_response(response, question)
+
+    async def ajudge_markscheme(self, question, issues=None):
+        response = await self.aco.chat(**self.prepare(self.judge_markscheme_request(question), issues))
+        return self.parse_response(response, question)
+
+    def parse_response(self, response, question=None):
+        json_obj = json.loads(response.message.content[0].text)
+        score = json_obj["score"]
+        json_obj.pop("score", None)
+        if self.patch and question is not None:
+            return self.apply_patch(question, json_obj), score
+        return json_obj, score
+
+    def apply_patch(self, question, patch):
+        """
+        Merges a patch response into question. As in BaseFormatter.combine_json, only fields
+        the question already has are updated and anything extra is ignored.
+        """
+        changes = {part.get("order"): part for part in patch.get("parts", [])}
+        merged = {key: patch.get(key, value) if key == "question" else value for key, value in question.items()}
+        merged["parts"] = [
+            {key: changes.get(part.get("order"), {}).get(key, value) for key, value in part.items()}
+            for part in question["parts"]
+        ]
+        return merged
+
+    def stage_judge(self, stage):
+        return self.ajudge_question if stage == "question" else self.ajudge_markscheme
+
+    async def ajudge_part(self, question, part, stage, issues=None):
+        """
+        Judges one part on its own, with the question's stem and topic as context.
+        """
+        judged, score = await self.stage_judge(stage)({**question, "parts": [part]}, issues)
+        new_part = dict(judged["parts"][0]) if judged.get("parts") else dict(part)
+        new_part["order"] = part["order"]
+        return new_part, score
+
+    async def ajudge_parts(self, question, stage, orders=None, issues=None):
+        """
+        Judges the parts whose order is in orders (all parts if None) concurrently,
+        then reassembles the question ordered by 'order'.
+        Returns the question and a {order: score} dict for the parts that were judged.
+        """
+        parts = sorted(question["parts"], key=lambda part: part["order"])
+        pending = [part for part in parts if orders is None or part["order"] in orders]
+        results = await asyncio.gather(
+            *(self.ajudge_part(question, part, stage, part_failures(issues or [], part["order"])) for part in pending)
+        )
+
+        judged = {part["order"]: result for part, result in zip(pending, results)}
+        new_parts = [judged[part["order"]][0] if part["order"] in judged else part for part in parts]
+        scores = {order: score for order, (_, score) in judged.items()}
+        return {**question, "parts": new_parts}, scores
+
+    def aggregate_score(self, question, scores):
+        """
+        Mark-weighted mean of the per-part scores.
+        """
+        weights = {part["order"]: max(int(part.get("marks") or 0), 1) for part in question["parts"]}
+        total = sum(weights[order] for order in scores)
+        return round(sum(score * weights[order] for order, score in scores.items()) / total) if total else 0
@@ -1,14 +1,14 @@
-import json
+from .BaseJudge import BaseJudge
+from .validators import validate_cs
 
 
-class CSJudge:
-    def __init__(self, co, model_id):
-        self.co = co
-        self.model_id = model_id
+class CSJudge(BaseJudge):
 
-    def judge_question(self, question):
+    def validate(self, question, stage):
+        return validate_cs(question, stage)
 
-        response = self.co.chat(
+    def judge_question_request(self, question):
+        return dict(
             model=self.model_id,
             messages=[
                 {
@@ -43,7 +43,7 @@ class CSJudge:
                         DO NOT add anything to the fields that does not explicitly fix a problem.
                         """,
                 },
-                {"role": "user", "content": str(question)},
+                {"role": "user", "content": self.serialize(question)},
             ],
             response_format={
                 "type": "json_object",
@@ -78,14 +78,9 @@ class CSJudge:
                 },
             },
         )
-        json_obj = json.loads(response.message.content[0].text)
-        score = json_obj["score"]
-        json_obj.pop("score", None)
-        return json_obj, score
 
-    def judge_markscheme(self, question):
-
-        response = self.co.chat(
+    def judge_markscheme_request(self, question):
+        return dict(
             model=self.model_id,
             messages=[
                 {
@@ -121,7 +116,7 @@ class CSJudge:
                     A step worth 1 mark should be marked [M1], a step worth 2 marks is [M2], all the Ms should strictly add up to 'marks'.
                     DO NOT add anything to the fields that does not explicitly fix a problem.""",
                 },
-                {"role": "user", "content": str(question)},
+                {"role": "user", "content": self.serialize(question)},
             ],
             response_format={
                 "type": "json_object",
@@ -156,7 +151,3 @@ class CSJudge:
                 },
             },
         )
-        json_obj = json.loads(response.message.content[0].text)
-        score = json_obj["score"]
-        json_obj.pop("score", None)
-        return json_obj, score
@@ -0,0 +1,123 @@
+import re
+
+PART_FIELDS = ["content", "marks", "markscheme", "subtopics", "order"]
+# IB mark tags, e.g. [M1], (A2), [R1], or bare as in "\hfill A1"
+MARK_TAG = re.compile(r"(?<![\w\\])([MAR])(\d+)(?!\w)")
+# a $ before an amount in a word problem ("$0.05 per cm", "costs $12.") is currency, not math
+CURRENCY = re.compile(r"(?<!\\)\$\d+(?:[.,]\d+)*(?=\s+[A-Za-z]|[.,;:!?)]+(?:\s|$)|$)")
+# CS markschemes open with "Award [X max]"
+AWARD_MAX = re.compile(r"\[(\d+)\s*max\]", re.IGNORECASE)
+
+
+def check_fields(question, required):
+    failures = [f"Missing field '{key}'." for key in required if key not in question]
+    for index, part in enumerate(question.get("parts", [])):
+        missing = [key for key in PART_FIELDS if key not in part]
+        if missing:
+            failures.append(f"Part {part.get('order', index + 1)}: missing {', '.join(missing)}.")
+    return failures
+
+
+def check_orders(question):
+    orders = [part.get("order") for part in question.get("parts", [])]
+    if orders != list(range(1, len(orders) + 1)):
+        return [f"Part 'order' values must run 1..{len(orders)} in sequence, got {orders}."]
+    return []
+
+
+def check_latex(text):
+    """
+    Checks that braces, $ delimiters and \\( \\) / \\[ \\] pairs are balanced. Currency amounts
+    such as $0.05 are not counted as delimiters.
+    """
+    failures = []
+    depth = 0
+    for char in re.sub(r"\\[{}$]", "", text):
+        depth += (char == "{") - (char == "}")
+        if depth < 0:
+            break
+    if depth != 0:
+        failures.append("unbalanced LaTeX braces")
+    if re.sub(r"\\\$", "", CURRENCY.sub("", text)).count("$") % 2:
+        failures.append("unmatched $ delimiter")
+    if text.count("\\(") != text.count("\\)"):
+        failures.append("unmatched \\( \\) delimiters")
+    if text.count("\\[") != text.count("\\]"):
+        failures.append("unmatched \\[ \\] delimiters")
+    return failures
+
+
+def check_part_latex(part, field):
+    value = part.get(field)
+    if not isinstance(value, str):
+        return []
+    return [f"Part {part.get('order')}: {field} has {failure}." for failure in check_latex(value)]
+
+
+def check_mark_tags(part, required=True):
+    """
+    The [M1]/A2 tags in a markscheme must add up to the part's marks.
+    """
+    markscheme, marks = part.get("markscheme"), part.get("marks")
+    if not isinstance(markscheme, str) or not isinstance(marks, int):
+        return []
+    tags = MARK_TAG.findall(markscheme)
+    if not tags:
+        return [f"Part {part.get('order')}: markscheme has no mark tags such as [M1] or A1."] if required else []
+    total = sum(int(value) for _, value in tags)
+    if total != marks:
+        return [f"Part {part.get('order')}: mark tags add up to {total} but marks is {marks}."]
+    return []
+
+
+def check_award_max(part):
+    markscheme, marks = part.get("markscheme"), part.get("marks")
+    if not isinstance(markscheme, str) or not isinstance(marks, int):
+        return []
+    match = AWARD_MAX.search(markscheme)
+    if match and int(match.group(1)) != marks:
+        return [f"Part {part.get('order')}: markscheme awards [{match.group(1)} max] but marks is {marks}."]
+    return []
+
+
+def validate_math(question, stage):
+    """
+    Returns the failures for a Math AA question: structure and LaTeX in content for the
+    "question" stage, mark tags and LaTeX in markschemes for the "markscheme" stage.
+    """
+    if stage == "question":
+        failures = check_fields(question, ["topic", "parts"]) + check_orders(question)
+        for part in question.get("parts", []):
+            failures += check_part_latex(part, "content")
+        return failures
+
+    failures = []
+    for part in question.get("parts", []):
+        # some markschemes set out their working without tags; worth a note, not a repair pass
+        if isinstance(part.get("markscheme"), str) and not MARK_TAG.search(part["markscheme"]):
+            print(f"Warning: part {part.get('order')} markscheme has no mark tags such as [M1] or A1")
+        failures += check_mark_tags(part, required=False) + check_part_latex(part, "markscheme")
+    return failures
+
+
+def validate_cs(question, stage):
+    """
+    Returns the failures for a CS question: structure for the "question" stage,
+    mark allocation for the "markscheme" stage.
+    """
+    if stage == "question":
+        return check_fields(question, ["question", "parts"]) + check_orders(question)
+
+    failures = []
+    for part in question.get("parts", []):
+        if AWARD_MAX.search(part.get("markscheme") or ""):
+            # "Award [X max]" lists more creditworthy points than marks, so tags need not add up
+            failures += check_award_max(part)
+        else:
+            failures += check_mark_tags(part, required=False)
+    return failures
+
+
+def part_failures(failures, order):
+    prefix = f"Part {order}:"
+    return [failure for failure in failures if failure.startswith(prefix)]
@@ -0,0 +1,191 @@
+import json
+import random
+import sqlite3
+import threading
+
+COUNTERS = [
+    "runs",
+    "iterations",
+    "iterations_saved",
+    "second_passes",
+    "second_pass_gain",
+    "second_pass_flips",
+    "capped_runs",
+    "capped_score",
+    "capped_passed",
+    "full_runs",
+    "full_score",
+    "full_passed",
+]
+
+
+class JudgePolicy:
+    """
+    Learns how many judge iterations are worth running for each (subject, topic, stage).
+
+    Every judge loop is recorded: its scores, and whether a second pass changed the outcome, i.e.
+    turned a failing draft into a passing one, or raised the score by at least min_gain. Once
+    min_samples second passes have been seen and fewer than min_change_rate of them changed the
+    outcome, that key is capped at one iteration. A share of capped runs (explore) still gets the
+    full budget so the statistics stay current. Overrides set a fixed limit for a key; topic "*"
+    applies to every topic of the subject, and 0 skips the stage.
+
+    Counters and overrides are kept in SQLite so the history survives restarts.
+    """
+
+    def __init__(self, path, min_samples=30, min_change_rate=0.05, min_gain=5.0, explore=0.1):
+        self.path = str(path)
+        self.min_samples = min_samples
+        self.min_change_rate = min_change_rate
+        self.min_gain = min_gain
+        self.explore = explore
+        self.stats = {}
+        self.overrides = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS judge_stats "
+            "(subject TEXT, topic TEXT, stage TEXT, counters TEXT NOT NULL, PRIMARY KEY (subject, topic, stage))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS judge_overrides "
+            "(subject TEXT, topic TEXT, stage TEXT, max_iterations INTEGER NOT NULL, PRIMARY KEY (subject, topic, stage))"
+        )
+        self._db.commit()
+        for subject, topic, stage, counters in self._db.execute("SELECT * FROM judge_stats"):
+            self.stats[(subject, topic, stage)] = {**dict.fromkeys(COUNTERS, 0), **json.loads(counters)}
+        for subject, topic, stage, limit in self._db.execute("SELECT * FROM judge_overrides"):
+            self.overrides[(subject, topic, stage)] = limit
+
+    def change_rate(self, counters):
+        return counters["second_pass_flips"] / counters["second_passes"] if counters["second_passes"] else None
+
+    def learned_limit(self, key, default):
+        counters = self.stats.get(key)
+        if counters is None or counters["second_passes"] < self.min_samples or default <= 1:
+            return default
+        return 1 if self.change_rate(counters) < self.min_change_rate else default
+
+    def max_iterations(self, subject, topic, stage, default):
+        """
+        The iteration budget for the next judge loop on this key.
+        """
+        for key in ((subject, topic, stage), (subject, "*", stage)):
+            if key in self.overrides:
+                return self.overrides[key]
+        limit = self.learned_limit((subject, topic, stage), default)
+        if limit < default and random.random() < self.explore:
+            return default
+        return limit
+
+    def record(self, subject, topic, stage, scores, passes, limit, default):
+        """
+        scores and passes hold one entry per iteration run; passes[i] is whether iteration i
+        met the acceptable score with no local check failures.
+        """
+        key = (subject, topic, stage)
+        with self._lock:
+            counters = self.stats.setdefault(key, dict.fromkeys(COUNTERS, 0))
+            counters["runs"] += 1
+            counters["iterations"] += len(scores)
+            if len(scores) >= 2:
+                gain = scores[1] - scores[0]
+                counters["second_passes"] += 1
+                counters["second_pass_gain"] += gain
+                counters["second_pass_flips"] += (passes[1] and not passes[0]) or gain >= self.min_gain
+            if limit < default:
+                # the loop stopped at the cap while the full budget would have kept going
+                if len(scores) == limit and not (passes and passes[-1]):
+                    counters["iterations_saved"] += default - limit
+                prefix = "capped"
+            else:
+                prefix = "full"
+            if scores:
+                counters[f"{prefix}_runs"] += 1
+                counters[f"{prefix}_score"] += scores[-1]
+                counters[f"{prefix}_passed"] += passes[-1]
+            self._db.execute(
+                "INSERT OR REPLACE INTO judge_stats (subject, topic, stage, counters) VALUES (?, ?, ?, ?)",
+                (*key, json.dumps(counters)),
+            )
+            self._db.commit()
+
+    def set_override(self, subject, topic, stage, max_iterations):
+        """
+        Fixes the limit for a key; None removes the override.
+        """
+        key = (subject, topic or "*", stage)
+        with self._lock:
+            if max_iterations is None:
+                self.overrides.pop(key, None)
+                self._db.execute("DELETE FROM judge_overrides WHERE subject = ? AND topic = ? AND stage = ?", key)
+            else:
+                self.overrides[key] = max_iterations
+                self._db.execute(
+                    "INSERT OR REPLACE INTO judge_overrides (subject, topic, stage, max_iterations) VALUES (?, ?, ?, ?)",
+                    (*key, max_iterations),
+                )
+            self._db.commit()
+
+    def report(self, default=2):
+        """
+        Per key: the limit in force, the evidence behind it, judge passes saved, and the final
+        scores of capped runs next to runs that had the full budget.
+        """
+        def mean(total, count):
+            return round(total / count, 2) if count else None
+
+        entries = []
+        with self._lock:
+            items = sorted(self.stats.items())
+        for (subject, topic, stage), counters in items:
+            override = self.overrides.get((subject, topic, stage), self.overrides.get((subject, "*", stage)))
+            limit = override if override is not None else self.learned_limit((subject, topic, stage), default)
+            change_rate = self.change_rate(counters)
+            entries.append(
+                {
+                    "subject": subject,
+                    "topic": topic,
+                    "stage": stage,
+                    "max_iterations": limit,
+                    "override": override,
+                    "runs": counters["runs"],
+                    "mean_iterations": mean(counters["iterations"], counters["runs"]),
+                    "second_passes": counters["second_passes"],
+                    "second_pass_change_rate": round(change_rate, 3) if change_rate is not None else None,
+                    "second_pass_mean_gain": mean(counters["second_pass_gain"], counters["second_passes"]),
+                    "iterations_saved": counters["iterations_saved"],
+                    "iterations_saved_per_question": mean(counters["iterations_saved"], counters["runs"]),
+                    "final_score_capped": mean(counters["capped_score"], counters["capped_runs"]),
+                    "final_score_full": mean(counters["full_score"], counters["full_runs"]),
+                    "pass_rate_capped": mean(counters["capped_passed"], counters["capped_runs"]),
+                    "pass_rate_full": mean(counters["full_passed"], counters["full_runs"]),
+                }
+            )
+        return {
+            "min_samples": self.min_samples,
+            "min_change_rate": self.min_change_rate,
+            "min_gain": self.min_gain,
+            "explore": self.explore,
+            "overrides": [
+                {"subject": subject, "topic": topic, "stage": stage, "max_iterations": limit}
+                for (subject, topic, stage), limit in sorted(self.overrides.items())
+            ],
+            "keys": entries,
+        }
+
+    def summary(self):
+        with self._lock:
+            items = list(self.stats.items())
+        # every question runs the "question" stage once
+        questions = sum(counters["runs"] for (_, _, stage), counters in items if stage == "question")
+        saved = sum(counters["iterations_saved"] for _, counters in items)
+        return {
+            "iterations_saved": saved,
+            "iterations_saved_per_question": round(saved / questions, 3) if questions else 0.0,
+            "capped_keys": sum(self.learned_limit(key, 2) < 2 for key, _ in items),
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
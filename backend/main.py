@@ -1,12 +1,28 @@
+import asyncio
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-import generator
-from models import GenerateCSRequest, GenerateMathRequest
+import export
+import metrics
+from batch import run_batch
+from inventory import QuestionInventory
+from jobs import JobQueue
+from papers import PaperAssembler
+from sse import stage_events, stocked_stages, unless_disconnected
+from static_assets import StaticAssets
+from models import (
+    GenerateBatchRequest,
+    GenerateCSRequest,
+    GenerateMathRequest,
+    JobRequest,
+    JudgePolicyOverride,
+    PaperRequest,
+)
 
 IS_BUNDLE = getattr(sys, "frozen", False)
 if IS_BUNDLE:  # PyInstaller bundle
@@ -16,9 +32,56 @@ else:
 
 STATIC_DIR = base_path / "static"
 ENV_PATH = base_path / ".env"
+frontend = StaticAssets(STATIC_DIR)
+
+
+def load_registry():
+    # imported here so the Cohere SDK and the generators load after the server is up
+    from registry import GeneratorRegistry
+
+    return GeneratorRegistry(env_path=ENV_PATH)
+
+
+async def warm_up(app: FastAPI):
+    if getattr(app.state, "registry", None) is None:  # benchmarks may install their own
+        app.state.registry = await asyncio.to_thread(load_registry)
+    app.state.inventory = QuestionInventory(app.state.registry)
+    app.state.inventory.start()
+    config = app.state.registry.config
+    app.state.jobs = JobQueue(
+        app.state.registry,
+        app.state.inventory,
+        path=config.get("JOBS_PATH") or ".jobs.sqlite",
+        workers=int(config.get("JOBS_WORKERS") or 2),
+    )
+    app.state.jobs.start()
+    app.state.papers = PaperAssembler(app.state.registry)
 
 
-app = FastAPI()
+async def get_registry(request: Request):
+    # requests that arrive while the registry is still loading wait for it;
+    # shielded so a client that disconnects does not cancel the shared load
+    await asyncio.shield(request.app.state.ready)
+    return request.app.state.registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # the frontend is served as soon as uvicorn binds; the generators load in the background
+    app.state.ready = asyncio.create_task(warm_up(app))
+    yield
+    if not app.state.ready.done():
+        app.state.ready.cancel()
+    await asyncio.gather(app.state.ready, return_exceptions=True)
+    if getattr(app.state, "jobs", None) is not None:
+        await app.state.jobs.stop()
+    if getattr(app.state, "inventory", None) is not None:
+        await app.state.inventory.stop()
+    if getattr(app.state, "registry", None) is not None:
+        await app.state.registry.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:8080", "http://localhost:8000"],
@@ -28,40 +91,246 @@ app.add_middleware(
 )
 
 
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
-app.mount("/assets", StaticFiles(directory=STATIC_DIR / "assets"), name="assets")
+@app.exception_handler(asyncio.TimeoutError)
+async def deadline_exceeded(request: Request, exc: asyncio.TimeoutError):
+    # raised when generate or fix_json runs past its DEADLINE_*, before there is a question to return
+    return JSONResponse({"error": "Deadline exceeded before a question was ready"}, status_code=504)
+
+
+@app.api_route("/", methods=["GET", "HEAD"])
+async def serve_frontend(request: Request):
+    return await frontend.index(request)
 
 
-@app.get("/")
-async def serve_frontend():
-    index_path = STATIC_DIR / "index.html"
-    return FileResponse(index_path)
+@app.api_route("/assets/{path:path}", methods=["GET", "HEAD"])
+async def serve_asset(path: str, request: Request):
+    response = await frontend.serve(request, f"assets/{path}")
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return response
 
 
-@app.get("/favicon.ico")
-async def favicon():
-    return FileResponse(STATIC_DIR / "favicon.ico")
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def serve_static(path: str, request: Request):
+    response = await frontend.serve(request, path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return response
 
 
 @app.post("/generate/math")
-def generate_question(req: GenerateMathRequest):
-    aa_generator = generator.MathAAGenerator(env_path=ENV_PATH)
-    question = aa_generator.generate(topic=req.topic, level=req.level)
+async def generate_math(req: GenerateMathRequest, request: Request):
+    registry = await get_registry(request)
+    question = request.app.state.inventory.take("math", req.topic, req.level)
+    if question is None:
+        aa_generator = registry.get("math")
+        question = await unless_disconnected(request, aa_generator.agenerate(topic=req.topic, level=req.level))
+        if question is None:  # the client went away
+            return Response(status_code=499)
     return JSONResponse(question)
 
 
 @app.post("/generate/cs")
-def generate_question(req: GenerateCSRequest):
-    aa_generator = generator.CSGenerator(env_path=ENV_PATH)
-    question = aa_generator.generate(topic=req.topic, level=req.level)
+async def generate_cs(req: GenerateCSRequest, request: Request):
+    registry = await get_registry(request)
+    question = request.app.state.inventory.take("cs", req.topic, req.level)
+    if question is None:
+        cs_generator = registry.get("cs")
+        question = await unless_disconnected(request, cs_generator.agenerate(topic=req.topic, level=req.level))
+        if question is None:  # the client went away
+            return Response(status_code=499)
     return JSONResponse(question)
 
 
+@app.post("/generate/math/stream")
+async def stream_math(req: GenerateMathRequest, request: Request):
+    registry = await get_registry(request)
+    question = request.app.state.inventory.take("math", req.topic, req.level)
+    if question is not None:
+        stages = stocked_stages(question)
+    else:
+        stages = registry.get("math").agenerate_stages(topic=req.topic, level=req.level)
+    return StreamingResponse(stage_events(request, stages), media_type="text/event-stream")
+
+
+@app.post("/generate/cs/stream")
+async def stream_cs(req: GenerateCSRequest, request: Request):
+    registry = await get_registry(request)
+    question = request.app.state.inventory.take("cs", req.topic, req.level)
+    if question is not None:
+        stages = stocked_stages(question)
+    else:
+        stages = registry.get("cs").agenerate_stages(topic=req.topic, level=req.level)
+    return StreamingResponse(stage_events(request, stages), media_type="text/event-stream")
+
+
+@app.post("/generate/batch")
+async def generate_batch(req: GenerateBatchRequest, request: Request):
+    registry = await get_registry(request)
+    results = await unless_disconnected(request, run_batch(registry, req.items, req.concurrency))
+    if results is None:  # the client went away
+        return Response(status_code=499)
+    return JSONResponse({"results": results})
+
+
+async def queue_job(request, subject, topic, level):
+    await get_registry(request)
+    job_id = request.app.state.jobs.submit(subject, topic, level)
+    return {"id": job_id, "status": "queued"}
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(req: JobRequest, request: Request):
+    return await queue_job(request, req.subject, req.topic, req.level)
+
+
+@app.post("/jobs/math", status_code=202)
+async def submit_math_job(req: GenerateMathRequest, request: Request):
+    # same body as /generate/math
+    return await queue_job(request, "math", req.topic, req.level)
+
+
+@app.post("/jobs/cs", status_code=202)
+async def submit_cs_job(req: GenerateCSRequest, request: Request):
+    return await queue_job(request, "cs", req.topic, req.level)
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str, request: Request):
+    await get_registry(request)
+    job = request.app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job
+
+
+@app.post("/papers")
+async def assemble_paper(req: PaperRequest, request: Request):
+    # packs stored questions to the mark total, generating only what stock cannot cover
+    await get_registry(request)
+    paper = await unless_disconnected(
+        request,
+        request.app.state.papers.assemble(
+            req.subject, req.total_marks, req.sections, req.min_score, req.time_budget, req.concurrency
+        ),
+    )
+    if paper is None:  # the client went away
+        return Response(status_code=499)
+    return paper
+
+
+@app.get("/questions")
+async def list_questions(
+    request: Request,
+    subject: Optional[str] = None,
+    topic: Optional[str] = None,
+    subtopic: Optional[str] = None,
+    level: Optional[str] = None,
+    q: Optional[str] = None,
+    min_score: Optional[float] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, pattern=r"^\d+$"),
+):
+    # stored questions, newest first; pass next_cursor back as cursor for the next page
+    registry = await get_registry(request)
+    questions, next_cursor = registry.store.query(
+        subject, topic, subtopic, level, q, min_score, limit, cursor
+    )
+    return {"questions": questions, "next_cursor": next_cursor}
+
+
+@app.get("/export")
+async def export_questions(
+    request: Request,
+    format: str = Query("jsonl", pattern="^(jsonl|paper|markscheme)$"),
+    subject: Optional[str] = None,
+    topic: Optional[str] = None,
+    subtopic: Optional[str] = None,
+    level: Optional[str] = None,
+    q: Optional[str] = None,
+    min_score: Optional[float] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
+    # streamed a page of questions at a time, so large exports start at once and use flat memory
+    registry = await get_registry(request)
+    filters = {
+        "subject": subject,
+        "topic": topic,
+        "subtopic": subtopic,
+        "level": level,
+        "search": q,
+        "min_score": min_score,
+    }
+    media_type, extension = export.FORMATS[format]
+    return StreamingResponse(
+        export.aexport(registry.store, format, filters, limit),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="questions-{format}.{extension}"'},
+    )
+
+
+@app.get("/stats")
+async def stats(request: Request):
+    registry = await get_registry(request)
+    return {
+        **registry.stats(),
+        "inventory": request.app.state.inventory.stats(),
+        "jobs": request.app.state.jobs.stats(),
+        "papers": request.app.state.papers.stats(),
+    }
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
+
+
+@app.post("/admin/reload")
+async def reload_config(request: Request):
+    # re-reads .env and rebuilds the shared client; only happens when asked
+    registry = await get_registry(request)
+    await asyncio.to_thread(registry.reload)
+    return {"status": "reloaded"}
+
+
+@app.get("/admin/judge-policy")
+async def judge_policy(request: Request):
+    # per topic and stage: the judge iteration limit in force and the history behind it
+    registry = await get_registry(request)
+    return registry.policy.report()
+
+
+@app.post("/admin/judge-policy")
+async def override_judge_policy(req: JudgePolicyOverride, request: Request):
+    registry = await get_registry(request)
+    registry.policy.set_override(req.subject, req.topic, req.stage, req.max_iterations)
+    return registry.policy.report()
+
+
+# registered last so it never shadows an API route
+@app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+async def spa_fallback(full_path: str, request: Request):
+    # top-level files such as favicon.ico, otherwise index.html for client-side routes
+    response = await frontend.serve(request, full_path) if full_path else None
+    return response or await frontend.index(request)
+
+
 if __name__ == "__main__":
+    import threading
+    import time
     import uvicorn
     import webbrowser
 
     print("Loading demo...")
-    print("Demo is now live on http://localhost:8000/")
-    webbrowser.open("http://localhost:8000")
-    uvicorn.run(app, host="127.0.0.1", port=8000, reload=False)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=8000, reload=False))
+
+    def open_browser():
+        # only once the port is bound, so the first page load does not fail
+        while not server.started:
+            time.sleep(0.05)
+        print("Demo is now live on http://localhost:8000/")
+        webbrowser.open("http://localhost:8000")
+
+    threading.Thread(target=open_browser, daemon=True).start()
+    server.run()
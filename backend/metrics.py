@@ -0,0 +1,88 @@
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+LATENCY_BUCKETS = (0.005, 0.05, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "ib_pipeline_stage_seconds",
+    "Latency of each pipeline stage (judge stages per iteration).",
+    ["subject", "stage", "iteration"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "ib_llm_tokens_total",
+    "Tokens reported in Cohere response usage.",
+    ["model", "direction"],
+)
+LLM_CALLS = Counter(
+    "ib_llm_calls_total",
+    "Chat calls sent upstream, by outcome.",
+    ["model", "outcome"],
+)
+JUDGE_SCORE = Histogram(
+    "ib_judge_score",
+    "Scores returned by the judges.",
+    ["subject", "stage"],
+    buckets=(50, 60, 70, 80, 85, 90, 95, 98, 100),
+)
+JUDGE_ITERATIONS = Histogram(
+    "ib_judge_iterations",
+    "Judge iterations used per question.",
+    ["subject", "stage"],
+    buckets=(1, 2, 3, 4, 5),
+)
+RATE_LIMIT_WAIT = Histogram(
+    "ib_rate_limit_wait_seconds",
+    "Time chat calls spent queued in the rate limiter.",
+    buckets=(0, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300),
+)
+RATE_LIMIT_ERRORS = Counter(
+    "ib_rate_limit_errors_total",
+    "429 responses from the Cohere API.",
+    ["model"],
+)
+
+HEDGED_CALLS = Counter(
+    "ib_hedged_calls_total",
+    "Duplicate chat calls sent after the p95 latency, and how many answered first.",
+    ["model", "outcome"],
+)
+STAGE_TIMEOUTS = Counter(
+    "ib_stage_timeouts_total",
+    "Pipeline stages cut short by their deadline.",
+    ["subject", "stage"],
+)
+
+
+@contextmanager
+def time_stage(subject, stage, iteration=0):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(subject, stage, str(iteration)).observe(time.perf_counter() - start)
+
+
+def record_response(model, response):
+    """
+    Counts the tokens in a chat response's usage metadata.
+    """
+    LLM_CALLS.labels(model, "ok").inc()
+    usage = getattr(response, "usage", None)
+    tokens = getattr(usage, "tokens", None) or getattr(usage, "billed_units", None)
+    for direction in ("input", "output"):
+        count = getattr(tokens, f"{direction}_tokens", None)
+        if count:
+            LLM_TOKENS.labels(model, direction).inc(count)
+
+
+def record_error(model, status):
+    LLM_CALLS.labels(model, "error").inc()
+    if status == 429:
+        RATE_LIMIT_ERRORS.labels(model).inc()
+
+
+def render():
+    return generate_latest(), CONTENT_TYPE_LATEST
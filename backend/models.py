@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
 
 
 class GenerateMathRequest(BaseModel):
@@ -9,3 +11,44 @@ class GenerateMathRequest(BaseModel):
 class GenerateCSRequest(BaseModel):
     topic: str = "Problem-solving and Programming"
     level: str = "SL"
+
+
+class BatchItem(BaseModel):
+    subject: Literal["math", "cs"]
+    topic: Optional[str] = None
+    level: str = "SL"
+    count: int = Field(1, ge=1, le=50)
+
+
+class JobRequest(BaseModel):
+    subject: Literal["math", "cs"]
+    topic: Optional[str] = None
+    level: str = "SL"
+
+
+class GenerateBatchRequest(BaseModel):
+    items: list[BatchItem]
+    concurrency: int = Field(4, ge=1, le=32)
+
+
+class JudgePolicyOverride(BaseModel):
+    subject: Literal["math", "cs"]
+    topic: Optional[str] = None  # None applies to every topic
+    stage: Literal["question", "markscheme"]
+    max_iterations: Optional[int] = Field(None, ge=0, le=5)  # None removes the override
+
+
+class PaperSection(BaseModel):
+    topic: Optional[str] = None  # None takes questions on any topic
+    subtopic: Optional[str] = None
+    level: Optional[str] = "SL"  # None takes either level
+    weight: float = Field(1.0, gt=0)  # share of the paper's marks
+
+
+class PaperRequest(BaseModel):
+    subject: Literal["math", "cs"]
+    total_marks: int = Field(..., ge=1, le=300)
+    sections: list[PaperSection] = Field(default_factory=lambda: [PaperSection()], min_length=1, max_length=20)
+    min_score: Optional[float] = None
+    time_budget: float = Field(60.0, ge=0, le=600)  # seconds to spend generating what stock cannot cover
+    concurrency: int = Field(4, ge=1, le=32)
@@ -0,0 +1,260 @@
+import asyncio
+import time
+
+# stored questions without judge scores count as this when ranking
+DEFAULT_SCORE = 80.0
+# marks a new question is expected to carry, until stock says otherwise
+TYPICAL_MARKS = 6
+# new questions to ask for per section in one round
+MAX_GAP_QUESTIONS = 10
+
+
+def split_marks(total, weights):
+    """
+    Splits total into integer shares proportional to weights (largest remainder).
+    """
+    exact = [total * weight / sum(weights) for weight in weights]
+    shares = [int(share) for share in exact]
+    by_remainder = sorted(range(len(weights)), key=lambda i: shares[i] - exact[i])
+    for i in by_remainder[: total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def pack(items, target):
+    """
+    0/1 knapsack over marks. items are (id, marks, value); returns (ids, marks) of the subset
+    whose marks come closest to target without going over, with the highest total value among those.
+    """
+    # no subset can use more than target // m items worth m marks, so only the best of those matter
+    buckets = {}
+    for item in sorted(items, key=lambda item: -item[2]):
+        bucket = buckets.setdefault(item[1], [])
+        if len(bucket) < target // item[1]:
+            bucket.append(item)
+    items = [item for bucket in buckets.values() for item in bucket]
+
+    unreachable = float("-inf")
+    best = [0.0] + [unreachable] * target
+    taken = []
+    for _, marks, value in items:
+        improved = bytearray(target + 1)
+        for total in range(target, marks - 1, -1):
+            candidate = best[total - marks] + value
+            if candidate > best[total]:
+                best[total] = candidate
+                improved[total] = 1
+        taken.append(improved)
+
+    reached = max(total for total in range(target + 1) if best[total] != unreachable)
+    ids, total = [], reached
+    for i in range(len(items) - 1, -1, -1):
+        if taken[i][total]:
+            ids.append(items[i][0])
+            total -= items[i][1]
+    return ids[::-1], reached
+
+
+class PaperIndex:
+    """
+    In-memory index of the stored questions by subject, topic and subtopic. It catches up with
+    the store's new rows before each paper, so building a paper never scans the table.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.last_seq = 0
+        self.questions = {}  # id -> (subject, topic, level, marks, score, subtopics)
+        self.by_subject = {}
+        self.by_topic = {}
+        self.by_subtopic = {}
+
+    def _remove(self, id):
+        old = self.questions.pop(id, None)
+        if old is None:
+            return
+        subject, topic, _, _, _, subtopics = old
+        self.by_subject[subject].discard(id)
+        self.by_topic[(subject, topic)].discard(id)
+        for subtopic in subtopics:
+            self.by_subtopic[(subject, subtopic)].discard(id)
+
+    def refresh(self):
+        for seq, id, subject, topic, level, marks, score, subtopics in self.store.summaries(self.last_seq):
+            self._remove(id)  # a question stored again replaces its old row
+            self.questions[id] = (subject, topic, level, marks, score, subtopics)
+            self.by_subject.setdefault(subject, set()).add(id)
+            self.by_topic.setdefault((subject, topic), set()).add(id)
+            for subtopic in subtopics:
+                self.by_subtopic.setdefault((subject, subtopic), set()).add(id)
+            self.last_seq = seq
+
+    def candidates(self, subject, topic=None, subtopic=None, level=None, min_score=None, exclude=()):
+        """
+        (id, marks, value) of matching questions; value is marks times score, so a fuller
+        paper is preferred first and better judged questions second.
+        """
+        ids = self.by_subject.get(subject, set())
+        if topic is not None:
+            ids = ids & self.by_topic.get((subject, topic), set())
+        if subtopic is not None:
+            ids = ids & self.by_subtopic.get((subject, subtopic), set())
+        items = []
+        for id in ids:
+            _, _, question_level, marks, score, _ = self.questions[id]
+            if id in exclude or marks <= 0 or (level is not None and question_level != level):
+                continue
+            if min_score is not None and (score is None or score < min_score):
+                continue
+            items.append((id, marks, marks * (score if score is not None else DEFAULT_SCORE)))
+        return items
+
+    def typical_marks(self, subject):
+        marks = sorted(self.questions[id][3] for id in self.by_subject.get(subject, ()) if self.questions[id][3] > 0)
+        return marks[len(marks) // 2] if marks else TYPICAL_MARKS
+
+
+class PaperAssembler:
+    """
+    Builds exam papers to a mark total from stored questions, generating only what stock lacks.
+
+    The total is split over the sections by weight, and each section is packed with a knapsack
+    over the stored questions' marks. Sections that come up short get new questions, generated
+    concurrently within the request's time budget; those are stored like any other generation,
+    so the next round packs again with them in the index. Only sections with a level and no
+    subtopic are generated for, and a section stops once a round's stored questions add nothing
+    to it; questions whose judging timed out are not stored and do not count. After max_rounds,
+    or when the budget runs out, the paper is returned as it stands with its unfilled marks.
+    """
+
+    def __init__(self, registry, max_rounds=3):
+        self.registry = registry
+        self.max_rounds = max_rounds
+        self.index = PaperIndex(registry.store)
+        self.papers = 0
+        self.generated = 0
+        self.select_seconds = 0.0
+        self._lock = asyncio.Lock()
+
+    async def select(self, subject, sections, targets, min_score):
+        async with self._lock:  # one refresh at a time, and none while packing
+            await asyncio.to_thread(self.index.refresh)
+            start = time.perf_counter()
+            used, picks = set(), []
+            for section, target in zip(sections, targets):
+                items = self.index.candidates(
+                    subject, section.topic, section.subtopic, section.level, min_score, exclude=used
+                )
+                ids, marks = pack(items, target) if target > 0 else ([], 0)
+                used.update(ids)
+                picks.append((ids, marks))
+            self.select_seconds += time.perf_counter() - start
+            return picks
+
+    async def fill(self, subject, requests, deadline, concurrency):
+        """
+        Generates one question per (section, topic, level) in requests, concurrently, until the
+        deadline. Returns (sections of the fully judged questions generated, errors, whether the
+        deadline cut generation short).
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def generate(topic, level):
+            async with semaphore:
+                return await self.registry.get(subject).agenerate(topic=topic, level=level)
+
+        tasks = [asyncio.ensure_future(generate(topic, level)) for _, topic, level in requests]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=max(deadline - time.monotonic(), 0))
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        filled, errors = [], []
+        for (section, _, _), task in zip(requests, tasks):
+            if task not in done:
+                continue
+            if task.exception() is not None:
+                errors.append(f"{type(task.exception()).__name__}: {task.exception()}")
+            elif task.result().get("judging_status", "complete") == "complete":
+                filled.append(section)
+            else:  # a question whose judging timed out is not stored, so it cannot be packed
+                errors.append("judging timed out")
+        self.generated += len(filled)
+        return filled, errors, bool(pending)
+
+    async def assemble(self, subject, total_marks, sections, min_score=None, time_budget=60.0, concurrency=4):
+        start = time.monotonic()
+        deadline = start + time_budget
+        targets = split_marks(total_marks, [section.weight for section in sections])
+        generated = [0] * len(sections)
+        errors, timed_out = [], False
+        # the generators take a topic and level only, so a section asking for a subtopic or for
+        # either level cannot be targeted; it keeps what stock has and reports the rest unfilled
+        stalled = {i for i, section in enumerate(sections) if section.subtopic is not None or section.level is None}
+        previous, attempted = None, set()
+
+        for attempt in range(self.max_rounds + 1):
+            picks = await self.select(subject, sections, targets, min_score)
+            if previous is not None:
+                # stored questions that added nothing to a section (duplicates, marks that overshoot) won't next
+                # time; a section whose questions all failed or timed out in judging is tried again
+                grown = [marks > before for (_, marks), before in zip(picks, previous)]
+                stalled.update(i for i in attempted if not grown[i])
+            previous = [marks for _, marks in picks]
+            gaps = [0 if i in stalled else target - marks for i, (target, (_, marks)) in enumerate(zip(targets, picks))]
+            if not any(gaps) or attempt == self.max_rounds:
+                break
+            if time.monotonic() >= deadline:
+                timed_out = True
+                break
+            typical = self.index.typical_marks(subject)
+            requests = []
+            for i, (section, gap) in enumerate(zip(sections, gaps)):
+                count = min(-(-gap // typical), MAX_GAP_QUESTIONS)
+                topic = section.topic or self.registry.get(subject).default_topic
+                requests += [(i, topic, section.level)] * count
+            filled, round_errors, timed_out = await self.fill(subject, requests, deadline, concurrency)
+            errors += round_errors
+            for i in filled:
+                generated[i] += 1
+            attempted = set(filled)
+            if timed_out:
+                picks = await self.select(subject, sections, targets, min_score)
+                break
+
+        entries = await asyncio.to_thread(lambda: [[self.registry.store.get(id) for id in ids] for ids, _ in picks])
+        self.papers += 1
+        marks = sum(marks for _, marks in picks)
+        return {
+            "subject": subject,
+            "total_marks": total_marks,
+            "marks": marks,
+            "unfilled_marks": total_marks - marks,
+            "sections": [
+                {
+                    "topic": section.topic,
+                    "subtopic": section.subtopic,
+                    "level": section.level,
+                    "target_marks": target,
+                    "marks": section_marks,
+                    "generated": section_generated,
+                    "questions": [entry for entry in section_entries if entry is not None],
+                }
+                for section, target, (_, section_marks), section_entries, section_generated in zip(
+                    sections, targets, picks, entries, generated
+                )
+            ],
+            "generated": sum(generated),
+            "generation_errors": errors,
+            "timed_out": timed_out,
+            "elapsed_s": round(time.monotonic() - start, 3),
+        }
+
+    def stats(self):
+        return {
+            "indexed": len(self.index.questions),
+            "papers": self.papers,
+            "generated": self.generated,
+            "mean_select_ms": round(self.select_seconds / self.papers * 1000, 2) if self.papers else 0.0,
+        }
@@ -0,0 +1,205 @@
+import threading
+
+import httpx
+from dotenv import dotenv_values
+
+import client
+import generator
+from dedup import DuplicateIndex
+from judge_policy import JudgePolicy
+from store import QuestionStore
+
+GENERATORS = {
+    "math": generator.MathAAGenerator,
+    "cs": generator.CSGenerator,
+}
+
+
+def api_keys(config):
+    """
+    The keys to spread calls over: COHERE_KEYS (comma separated), or the single COHERE_KEY.
+    """
+    keys = [key.strip() for key in (config.get("COHERE_KEYS") or "").split(",") if key.strip()]
+    return keys or [config.get("COHERE_KEY")]
+
+
+class ApiKey:
+    """
+    One API key in the pool: its own rate budget, health and clients, and a generator per subject
+    bound to those clients, so every call a question makes stays on the key it was routed to.
+    """
+
+    def __init__(self, key, limiter, health, co, aco, generators):
+        self.label = f"...{key[-4:]}" if key else "default"
+        self.key = key
+        self.limiter = limiter
+        self.health = health
+        self.co = co
+        self.aco = aco
+        self.generators = generators
+
+    def stats(self):
+        return {"key": self.label, **self.limiter.stats(), **self.health.stats()}
+
+
+class GeneratorRegistry:
+    """
+    Holds one generator per subject and API key for the lifetime of the server.
+    All generators share a keep-alive connection pool, so requests reuse warm TLS connections
+    instead of building a client per call. Each question is routed to the healthy key with the
+    shortest queue, so throughput grows with the number of keys in COHERE_KEYS.
+    """
+
+    def __init__(self, env_path=".env", max_connections=100, keepalive_expiry=60, upstream=None):
+        """
+        upstream replaces the Cohere clients, e.g. with benchmarks/fake_cohere.py: either a
+        (sync, async) pair shared by every key, or a function from a key to its pair.
+        """
+        self.env_path = env_path
+        self.upstream = upstream
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._lock = threading.Lock()
+        self._retired = []
+        self.config = {}
+        self.http = None
+        self.ahttp = None
+        self.cache = None
+        self.keys = []
+        self.store = None
+        self.duplicates = None
+        self.policy = None
+        self.load()
+
+    def upstream_for(self, key):
+        if callable(self.upstream):
+            return self.upstream(key)
+        return self.upstream
+
+    def load(self):
+        """
+        Reads .env and builds the clients and generators for every key.
+        """
+        config = dotenv_values(self.env_path)
+        # every subject shares a key, so they share its budget
+        key_limit = int(config.get("KEY_LIMIT") or min(cls.KEY_LIMIT for cls in GENERATORS.values()))
+        burst = int(config.get("RATE_LIMIT_BURST") or 1)
+
+        http = httpx.Client(limits=self.limits)
+        ahttp = httpx.AsyncClient(limits=self.limits)
+        cache = client.open_cache(config)
+        if self.store is None:
+            # the store outlives reloads, since in-flight generators still write to it
+            self.store = QuestionStore(config.get("QUESTION_STORE_PATH") or ".questions.sqlite")
+        if self.duplicates is None:
+            self.duplicates = DuplicateIndex(config.get("DEDUP_PATH") or ".dedup.sqlite")
+        self.duplicates.threshold = float(config.get("DEDUP_THRESHOLD") or 0.8)
+        check_duplicates = client.enabled(config.get("DEDUP", "1"))
+        if self.policy is None:
+            self.policy = JudgePolicy(config.get("JUDGE_POLICY_PATH") or ".judge_policy.sqlite")
+        adaptive = (config.get("JUDGE_POLICY") or "adaptive") == "adaptive"
+        deadlines = {
+            stage: float(config[f"DEADLINE_{stage.upper()}"])
+            for stage in ("generate", "fix_json", "judge", "total")
+            if config.get(f"DEADLINE_{stage.upper()}")
+        }
+
+        previous = {key.key: key for key in self.keys}
+        formatter_stats = {}
+        keys = []
+        for api_key in api_keys(config):
+            old = previous.get(api_key)
+            # a key that is still configured keeps its budget and health across reloads
+            limiter = old.limiter if old is not None and old.limiter.limit == key_limit else None
+            limiter = limiter or client.RateLimiter(key_limit, burst=burst)
+            health = old.health if old is not None else client.KeyHealth(
+                threshold=int(config.get("KEY_EJECT_AFTER") or 3),
+                cooldown=float(config.get("KEY_EJECT_SECONDS") or 60),
+            )
+            co, aco = client.build_clients(
+                config,
+                limiter,
+                cache,
+                generation_models=[cls.MODEL_ID for cls in GENERATORS.values()],
+                httpx_client=http,
+                async_httpx_client=ahttp,
+                upstream=self.upstream_for(api_key),
+                api_key=api_key,
+                health=health,
+            )
+            generators = {subject: cls(co=co, aco=aco) for subject, cls in GENERATORS.items()}
+            for subject, gen in generators.items():
+                gen.store = self.store
+                # with DEDUP=0 new questions are still indexed, so turning the check back on sees them
+                gen.duplicates = self.duplicates
+                gen.check_duplicates = check_duplicates
+                gen.duplicate_retries = int(config.get("DEDUP_RETRIES") or gen.duplicate_retries)
+                gen.policy = self.policy if adaptive else None
+                gen.deadlines = deadlines
+                gen.judge_mode = config.get("JUDGE_MODE") or gen.judge_mode
+                gen.judge.patch = client.enabled(config.get("JUDGE_PATCH"))
+                # fix_json stats are reported per subject, across keys
+                gen.formatter.json_stats = formatter_stats.setdefault(subject, gen.formatter.json_stats)
+            keys.append(ApiKey(api_key, limiter, health, co, aco, generators))
+
+        with self._lock:
+            if self.http is not None:
+                # in-flight requests may still hold the old generators, so close the pools on shutdown
+                self._retired.append((self.http, self.ahttp, self.cache))
+            self.config, self.http, self.ahttp, self.cache = config, http, ahttp, cache
+            self.keys = keys
+
+    def reload(self):
+        self.load()
+
+    def pick(self):
+        """
+        The available key whose next call would wait the least, then the one with the most
+        tokens left. If every key is ejected the least loaded one is used anyway, rather than
+        failing the request.
+        """
+        keys = self.keys
+        available = [key for key in keys if key.health.available()] or keys
+        return min(
+            available,
+            key=lambda key: (key.limiter.queue_wait(), -key.limiter.tokens, key.limiter.waiting),
+        )
+
+    def get(self, subject):
+        """
+        A generator for one question, bound to the key picked for it.
+        """
+        return self.pick().generators[subject]
+
+    def idle(self):
+        """
+        True when some available key has no calls queued.
+        """
+        return any(key.limiter.waiting == 0 for key in self.keys if key.health.available())
+
+    def stats(self):
+        generators = self.keys[0].generators
+        return {
+            "keys": [key.stats() for key in self.keys],
+            "fix_json": {subject: gen.formatter.stats() for subject, gen in generators.items()},
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "store": self.store.stats(),
+            "duplicates": self.duplicates.stats(),
+            "judge_policy": self.policy.summary(),
+        }
+
+    async def aclose(self):
+        with self._lock:
+            resources = self._retired + [(self.http, self.ahttp, self.cache)]
+            self._retired = []
+        for http, ahttp, cache in resources:
+            http.close()
+            await ahttp.aclose()
+            if cache is not None:
+                cache.close()
+        self.store.close()
+        self.duplicates.close()
+        self.policy.close()
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stocked_stages(question):
+    """
+    Stage events for a question served from the inventory, which is already finalized.
+    """
+    yield {"stage": "finalized", "question": question}
+
+
+async def stage_events(request, stages, poll_interval=0.5):
+    """
+    Turns a generator's stage events into server-sent events.
+    The client is checked every poll_interval seconds while a stage runs, and once it goes away
+    the pipeline is closed, cancelling its in-flight upstream calls.
+    """
+    step = None
+    try:
+        while True:
+            step = asyncio.ensure_future(stages.__anext__())
+            while not step.done():
+                await asyncio.wait({step}, timeout=poll_interval)
+                if not step.done() and await request.is_disconnected():
+                    return
+            try:
+                event = step.result()
+            except StopAsyncIteration:
+                break
+            yield format_event(event["stage"], event)
+    except Exception as e:
+        yield format_event("error", {"stage": "error", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        if step is not None and not step.done():
+            step.cancel()
+            await asyncio.gather(step, return_exceptions=True)
+        await stages.aclose()
+
+
+async def unless_disconnected(request, awaitable, poll_interval=0.5):
+    """
+    Awaits a pipeline for a plain (non-streaming) request. If the client goes away first the
+    pipeline is cancelled, along with its in-flight upstream calls, and None is returned.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                return None
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,199 @@
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import re
+from pathlib import Path
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+# the Windows registry can map these to text/plain, which browsers refuse for modules
+MEDIA_TYPES = {
+    ".js": "text/javascript",
+    ".mjs": "text/javascript",
+    ".css": "text/css",
+    ".html": "text/html",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+    ".wasm": "application/wasm",
+    ".ico": "image/x-icon",
+}
+COMPRESSIBLE = re.compile(r"^(text/|application/(json|javascript|wasm|xml)|image/(svg\+xml|x-icon))")
+# Vite names built assets name-<hash>.ext, so their content never changes under the same URL
+HASHED_NAME = re.compile(r"[-.][A-Za-z0-9_-]{8,}\.\w+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+ENCODINGS = ("br", "gzip")
+EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+
+def media_type_of(path):
+    return MEDIA_TYPES.get(path.suffix.lower()) or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+
+def compress(data, encoding, best=False):
+    """
+    gzip, or brotli when installed; best trades time for size, for bundle-time compression.
+    """
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11 if best else 5)
+
+
+def accepted_encodings(header):
+    """
+    Encodings from an Accept-Encoding header that the client takes (q > 0), best first.
+    """
+    accepted = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    return [encoding for encoding in ENCODINGS if accepted.get(encoding, wildcard) > 0]
+
+
+class StaticAsset:
+    """
+    One file held in memory, with its compressed variants and ETags.
+    """
+
+    def __init__(self, path, stat):
+        self.path = path
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self.media_type = media_type_of(path)
+        self.body = path.read_bytes()
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.variants = {}
+        if COMPRESSIBLE.match(self.media_type) and len(self.body) >= 512:
+            for encoding in ENCODINGS:
+                if encoding == "br" and brotli is None:
+                    continue
+                data = self.precompressed(encoding)
+                if data is None:
+                    data = compress(self.body, encoding)
+                if len(data) < len(self.body):
+                    self.variants[encoding] = data
+
+    def precompressed(self, encoding):
+        """
+        The .gz/.br file bundle.py wrote next to this one, if it is there and still matches.
+        Checked by content, since a PyInstaller bundle does not keep modification times.
+        """
+        path = self.path.with_name(self.path.name + EXTENSIONS[encoding])
+        if not path.is_file():
+            return None
+        data = path.read_bytes()
+        try:
+            original = gzip.decompress(data) if encoding == "gzip" else brotli.decompress(data)
+        except Exception:
+            return None
+        return data if original == self.body else None
+
+    def response(self, request, cache_control):
+        encoding = next((e for e in accepted_encodings(request.headers.get("accept-encoding")) if e in self.variants), None)
+        etag = f'"{self.etag}-{encoding}"' if encoding else f'"{self.etag}"'
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if self.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(self.variants.get(encoding, self.body), headers=headers, media_type=self.media_type)
+
+
+class StaticAssets:
+    """
+    Serves the built frontend from memory.
+
+    Each file is read once, on first request, along with gzip and (if the brotli package is
+    installed) brotli variants: the .gz/.br files bundle.py writes at build time, or compressed
+    on the spot when there are none. The variant is chosen from Accept-Encoding. Every response
+    carries an ETag; hashed build assets are cached for a year as immutable, everything else is
+    revalidated. A file that changes on disk is reloaded, and a missing directory just means 404s.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.assets = {}
+
+    def resolve(self, relative):
+        root = self.directory.resolve()
+        path = (root / relative).resolve()
+        if path != root and root not in path.parents:
+            return None
+        return path if path.is_file() else None
+
+    def load(self, path):
+        stat = path.stat()
+        asset = self.assets.get(path)
+        if asset is None or asset.version != (stat.st_mtime_ns, stat.st_size):
+            asset = self.assets[path] = StaticAsset(path, stat)
+        return asset
+
+    async def get(self, relative):
+        """
+        The asset for a path relative to the directory, or None if there is no such file.
+        """
+        path = self.resolve(relative)
+        if path is None:
+            return None
+        asset = self.assets.get(path)
+        if asset is not None:
+            stat = path.stat()
+            if asset.version == (stat.st_mtime_ns, stat.st_size):
+                return asset
+        # reading and compressing a new file is kept off the event loop
+        return await asyncio.to_thread(self.load, path)
+
+    def cache_control(self, relative):
+        return IMMUTABLE if relative.startswith("assets/") and HASHED_NAME.search(relative) else REVALIDATE
+
+    async def serve(self, request, relative):
+        asset = await self.get(relative)
+        if asset is None:
+            return None
+        return asset.response(request, self.cache_control(relative))
+
+    async def index(self, request):
+        """
+        index.html, for / and every client-side route.
+        """
+        response = await self.serve(request, "index.html")
+        if response is None:
+            return JSONResponse({"error": "index.html not found"}, status_code=404)
+        return response
+
+    def precompress(self):
+        """
+        Writes .gz (and .br) files next to every compressible file, for bundling. Returns their count.
+        """
+        written = 0
+        for path in sorted(self.directory.rglob("*")):
+            if not path.is_file() or path.suffix in (".gz", ".br"):
+                continue
+            if not COMPRESSIBLE.match(media_type_of(path)) or path.stat().st_size < 512:
+                continue
+            data = path.read_bytes()
+            for encoding in ENCODINGS:
+                if encoding == "br" and brotli is None:
+                    continue
+                compressed = compress(data, encoding, best=True)
+                if len(compressed) < len(data):
+                    path.with_name(path.name + EXTENSIONS[encoding]).write_bytes(compressed)
+                    written += 1
+        return written
@@ -0,0 +1,219 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+def question_text(question):
+    """
+    The searchable text of a question: the CS stem, if any, and every part's content.
+    """
+    texts = [question.get("question") or ""]
+    texts += [part.get("content") or "" for part in question.get("parts", [])]
+    return "\n".join(text for text in texts if isinstance(text, str) and text)
+
+
+def subtopics_of(question):
+    subtopics = []
+    for part in question.get("parts", []):
+        for subtopic in part.get("subtopics") or []:
+            if isinstance(subtopic, str) and subtopic not in subtopics:
+                subtopics.append(subtopic)
+    return subtopics
+
+
+def marks_of(question):
+    return sum(part.get("marks") for part in question.get("parts", []) if isinstance(part.get("marks"), int))
+
+
+class QuestionStore:
+    """
+    SQLite store of every finalized question, so a question is generated once and can be found again.
+    Questions are indexed by subject, topic, level and subtopic, with full-text search over their
+    content (FTS5 when the SQLite build has it, LIKE otherwise). score is the lowest judge score
+    the question finished with, across the question and markscheme stages.
+    """
+
+    COLUMNS = "seq, id, subject, topic, level, marks, score, scores, models, created, body"
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.added = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS questions (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                subject TEXT NOT NULL,
+                topic TEXT,
+                level TEXT,
+                marks INTEGER NOT NULL,
+                score REAL,
+                scores TEXT NOT NULL,
+                models TEXT NOT NULL,
+                created REAL NOT NULL,
+                content TEXT NOT NULL,
+                body TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS questions_topic ON questions (subject, topic, level);
+            CREATE INDEX IF NOT EXISTS questions_level ON questions (level);
+            CREATE TABLE IF NOT EXISTS question_subtopics (
+                seq INTEGER NOT NULL REFERENCES questions (seq) ON DELETE CASCADE,
+                subtopic TEXT NOT NULL,
+                PRIMARY KEY (subtopic, seq)
+            );
+            """
+        )
+        try:
+            self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5 (content)")
+            self.fts = True
+        except sqlite3.OperationalError:  # SQLite built without FTS5
+            self.fts = False
+        self._db.commit()
+
+    def add(self, question, subject, level=None, scores=None, models=None):
+        """
+        Persists a finalized question. Adding the same id again replaces the stored copy.
+        """
+        subtopics = subtopics_of(question)
+        content = question_text(question)
+        scores = scores or {}
+        row = (
+            question["id"],
+            subject,
+            question.get("topic"),
+            level,
+            marks_of(question),
+            min(scores.values()) if scores else None,
+            json.dumps(scores),
+            json.dumps(models or {}),
+            time.time(),
+            content,
+            json.dumps(question),
+        )
+        with self._lock:
+            self._remove(question["id"])
+            cursor = self._db.execute(
+                "INSERT INTO questions (id, subject, topic, level, marks, score, scores, models, created, content, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+            seq = cursor.lastrowid
+            self._db.executemany(
+                "INSERT INTO question_subtopics (seq, subtopic) VALUES (?, ?)",
+                [(seq, subtopic) for subtopic in subtopics],
+            )
+            if self.fts:
+                self._db.execute("INSERT INTO questions_fts (rowid, content) VALUES (?, ?)", (seq, content))
+            self._db.commit()
+            self.added += 1
+
+    def _remove(self, id):
+        row = self._db.execute("SELECT seq FROM questions WHERE id = ?", (id,)).fetchone()
+        if row is None:
+            return
+        self._db.execute("DELETE FROM question_subtopics WHERE seq = ?", row)
+        if self.fts:
+            self._db.execute("DELETE FROM questions_fts WHERE rowid = ?", row)
+        self._db.execute("DELETE FROM questions WHERE seq = ?", row)
+
+    def get(self, id):
+        with self._lock:
+            row = self._db.execute(f"SELECT {self.COLUMNS} FROM questions WHERE id = ?", (id,)).fetchone()
+        return self.entry(row) if row else None
+
+    def entry(self, row):
+        seq, id, subject, topic, level, marks, score, scores, models, created, body = row
+        question = json.loads(body)
+        return {
+            "id": id,
+            "subject": subject,
+            "topic": topic,
+            "level": level,
+            "subtopics": subtopics_of(question),
+            "marks": marks,
+            "score": score,
+            "scores": json.loads(scores),
+            "models": json.loads(models),
+            "created": created,
+            "question": question,
+        }
+
+    def query(
+        self,
+        subject=None,
+        topic=None,
+        subtopic=None,
+        level=None,
+        search=None,
+        min_score=None,
+        limit=20,
+        cursor=None,
+    ):
+        """
+        Returns (entries, next_cursor), newest first. Pass next_cursor back as cursor for the
+        following page; it is None once there are no more results.
+        """
+        where, params = [], []
+        for column, value in (("subject", subject), ("topic", topic), ("level", level)):
+            if value is not None:
+                where.append(f"q.{column} = ?")
+                params.append(value)
+        if subtopic is not None:
+            where.append("q.seq IN (SELECT seq FROM question_subtopics WHERE subtopic = ?)")
+            params.append(subtopic)
+        if min_score is not None:
+            where.append("q.score >= ?")
+            params.append(min_score)
+        if search:
+            if self.fts:
+                where.append("q.seq IN (SELECT rowid FROM questions_fts WHERE questions_fts MATCH ?)")
+                # quote each term so user input cannot be read as FTS5 query syntax
+                params.append(" ".join('"' + term.replace('"', '""') + '"' for term in search.split()))
+            else:
+                where.append("q.content LIKE ?")
+                params.append(f"%{search}%")
+        if cursor is not None:
+            where.append("q.seq < ?")
+            params.append(int(cursor))
+
+        columns = ", ".join(f"q.{column}" for column in self.COLUMNS.split(", "))
+        sql = f"SELECT {columns} FROM questions q"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY q.seq DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+        return [self.entry(row) for row in rows[:limit]], next_cursor
+
+    def summaries(self, after=0):
+        """
+        (seq, id, subject, topic, level, marks, score, subtopics) of the questions stored after
+        seq after, oldest first, without loading their bodies; for in-memory indexes to catch up.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, id, subject, topic, level, marks, score FROM questions WHERE seq > ? ORDER BY seq",
+                (after,),
+            ).fetchall()
+            subtopic_rows = self._db.execute(
+                "SELECT seq, subtopic FROM question_subtopics WHERE seq > ?", (after,)
+            ).fetchall()
+        subtopics = {}
+        for seq, subtopic in subtopic_rows:
+            subtopics.setdefault(seq, []).append(subtopic)
+        return [(*row, subtopics.get(row[0], [])) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self):
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM questions").fetchone()
+        return {"questions": count, "added": self.added, "full_text_search": self.fts}
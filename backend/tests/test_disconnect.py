@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+import main
+from models import GenerateBatchRequest, PaperRequest
+
+
+class Hanging:
+    """
+    Stands in for a generator or the paper assembler: never finishes, and records being cancelled.
+    """
+
+    def __init__(self):
+        self.started = 0
+        self.cancelled = 0
+
+    async def hang(self, *args, **kwargs):
+        self.started += 1
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    agenerate = hang
+    assemble = hang
+
+
+def disconnected_request(hanging):
+    async def is_disconnected():
+        return hanging.started > 0  # the client leaves once work is under way
+
+    async def ready():
+        pass
+
+    registry = SimpleNamespace(get=lambda subject: hanging)
+    state = SimpleNamespace(registry=registry, papers=hanging)
+    request = SimpleNamespace(app=SimpleNamespace(state=state), is_disconnected=is_disconnected)
+    return request, ready
+
+
+def test_batch_cancels_its_generations_when_the_client_disconnects():
+    async def run():
+        hanging = Hanging()
+        request, ready = disconnected_request(hanging)
+        request.app.state.ready = asyncio.ensure_future(ready())
+        body = GenerateBatchRequest(items=[{"subject": "math", "count": 3}], concurrency=3)
+        response = await asyncio.wait_for(main.generate_batch(body, request), 5)
+        return response.status_code, hanging
+
+    status, hanging = asyncio.run(run())
+    assert status == 499
+    assert hanging.started == 3 and hanging.cancelled == 3
+
+
+def test_paper_is_cancelled_when_the_client_disconnects():
+    async def run():
+        hanging = Hanging()
+        request, ready = disconnected_request(hanging)
+        request.app.state.ready = asyncio.ensure_future(ready())
+        body = PaperRequest(subject="math", total_marks=20, sections=[{"topic": "Calculus"}])
+        response = await asyncio.wait_for(main.assemble_paper(body, request), 5)
+        return response.status_code, hanging
+
+    status, hanging = asyncio.run(run())
+    assert status == 499
+    assert hanging.cancelled == 1
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from formatter import local_json
+from formatter.MathAAFormatter import MathAAFormatter
+
+
+def question(markscheme):
+    return {
+        "topic": "Calculus",
+        "parts": [
+            {
+                "order": 1,
+                "content": "Find $\\int 2x e^{x^2} \\, dx$.",
+                "markscheme": markscheme,
+                "marks": 3,
+                "subtopics": ["Integration by substitution"],
+            }
+        ],
+    }
+
+
+@pytest.mark.parametrize("after", ["u = x^2", "e^{2x}", "abla f = 0", "ot all terms vanish"])
+def test_json_dumps_round_trip_never_turns_newlines_into_latex(after):
+    original = question(f"[M1]\n{after} \\quad [A1]")
+    text = json.dumps(original)
+
+    assert local_json.loads(text) == original
+    # a line break before a LaTeX command suffix is ambiguous, so parse leaves it to the formatter
+    assert local_json.parse(text, MathAAFormatter.SCHEMA) in (None, original)
+
+
+def test_json_dumps_round_trip_keeps_other_line_breaks():
+    original = question("[M1]\nsubstitute $u = x^2$\n\\therefore $e^{x^2} + C$ [A1]")
+    assert local_json.parse(json.dumps(original), MathAAFormatter.SCHEMA) == original
+
+
+def single_escaped(content):
+    part = f'{{"order": 1, "content": "{content}", "markscheme": "[A1]", "marks": 1, "subtopics": []}}'
+    return '{"topic": "Calculus", "parts": [' + part + "]}"
+
+
+def test_single_escaped_latex_is_repaired_when_strict_parsing_fails():
+    # \alpha is not a JSON escape, so strict parsing fails and the repairs run
+    text = single_escaped("Show $\\alpha \\neq \\nabla f$")
+    content = local_json.parse(text, MathAAFormatter.SCHEMA)["parts"][0]["content"]
+    assert content == "Show $\\alpha \\neq \\nabla f$"
+
+
+def test_single_escaped_latex_in_valid_json_falls_back():
+    text = single_escaped("Show $a \\neq b$")
+    assert local_json.parse(text, MathAAFormatter.SCHEMA) is None
@@ -0,0 +1,19 @@
+from judge.validators import check_latex, check_mark_tags, validate_math
+
+
+def test_currency_is_not_a_math_delimiter():
+    assert check_latex("A sheet costs $0.05 per cm², so find $C(x)$.") == []
+    assert check_latex("Tickets cost $12, and $n$ are sold.") == []
+    assert check_latex("Solve $2x + 1 = 5$ and $2 + 3$.") == []
+    assert check_latex("Solve $2x + 1 = 5") == ["unmatched $ delimiter"]
+
+
+def test_bare_mark_tags_count():
+    part = {"order": 1, "marks": 3, "markscheme": "\\( x = 2 \\) \\hfill M1\n\\( y = 3 \\) \\hfill (A1)(A1)"}
+    assert check_mark_tags(part) == []
+
+
+def test_missing_mark_tags_are_a_warning_not_a_failure(capsys):
+    question = {"parts": [{"order": 1, "marks": 2, "markscheme": "\\( x = 2 \\)"}]}
+    assert validate_math(question, "markscheme") == []
+    assert "no mark tags" in capsys.readouterr().out
@@ -0,0 +1,150 @@
+"""
+Converts nested question datasets to Cohere's chat-finetune-input JSONL, streaming so corpora
+of any size run in bounded memory.
+
+    python convert.py raw/*.jsonl --out data/compsci [--eval-fraction 0.1] [--workers 8]
+    python convert.py raw.jsonl --out data/calculus --shard-records 50000
+
+Each input line is one record; lines are converted and validated by a pool of worker processes
+in batches, and written in input order. Records are assigned to training or eval by a hash of
+their content, so the split is stable across runs; if that leaves eval empty, the last training
+record goes to eval instead. The output directory always gets training.jsonl and eval.jsonl, the
+layout finetune.py reads, or numbered shards (training-00000.jsonl, ...) when --shard-records is
+given, and conversion fails if either would be empty. Invalid records are counted and written to rejected.jsonl.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from itertools import islice
+from multiprocessing import Pool
+from pathlib import Path
+
+from utils import convert_dataset_format, validate_record
+
+
+class ConvertError(Exception):
+    pass
+
+
+def convert_line(line):
+    """
+    Returns (split, output line) for a valid record, or (None, rejection line) for an invalid one.
+    Runs in the worker processes.
+    """
+    line, eval_fraction = line
+    try:
+        record = convert_dataset_format(json.loads(line))
+        failures = validate_record(record)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        record, failures = None, [f"{type(e).__name__}: {e}"]
+    if failures:
+        return None, json.dumps({"failures": failures, "line": line.strip()[:500]}, ensure_ascii=False)
+
+    output = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+    bucket = int.from_bytes(hashlib.sha1(output.encode("utf-8")).digest()[:8], "big") / 2**64
+    return ("eval" if bucket < eval_fraction else "training"), output
+
+
+def read_lines(paths):
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield line
+
+
+class ShardWriter:
+    """
+    Appends lines to name.jsonl, or to name-00000.jsonl, name-00001.jsonl, ... of shard_records lines each.
+    """
+
+    def __init__(self, directory, name, shard_records=None):
+        self.directory = directory
+        self.name = name
+        self.shard_records = shard_records
+        self.count = 0
+        self.file = None
+
+    def path(self):
+        if self.shard_records is None:
+            return self.directory / f"{self.name}.jsonl"
+        return self.directory / f"{self.name}-{self.count // self.shard_records:05d}.jsonl"
+
+    def write(self, line):
+        if self.file is None or (self.shard_records and self.count % self.shard_records == 0):
+            self.close()
+            self.file = open(self.path(), "w", encoding="utf-8")
+        self.file.write(line + "\n")
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def touch(self):
+        """
+        Creates the (first) output file even if nothing was written, so the layout is always complete.
+        """
+        if self.count == 0:
+            self.path().touch()
+
+
+def convert(paths, out, eval_fraction=0.1, workers=None, batch_size=2000, shard_records=None):
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    writers = {
+        "training": ShardWriter(out, "training", shard_records),
+        "eval": ShardWriter(out, "eval", shard_records),
+        None: ShardWriter(out, "rejected"),
+    }
+    lines = ((line, eval_fraction) for line in read_lines(paths))
+    # the latest training record is held back, so it can go to eval if the hash split gives eval none
+    held = None
+    try:
+        with Pool(workers) as pool:
+            # batches keep memory bounded; Pool.imap alone would read the whole input ahead
+            while batch := list(islice(lines, batch_size)):
+                for split, output in pool.imap(convert_line, batch, chunksize=64):
+                    if split == "training":
+                        held, output = output, held
+                        if output is None:
+                            continue
+                    writers[split].write(output)
+        if held is not None:
+            short = eval_fraction > 0 and writers["eval"].count == 0 and writers["training"].count > 0
+            writers["eval" if short else "training"].write(held)
+    finally:
+        for writer in writers.values():
+            writer.close()
+        writers["training"].touch()
+        writers["eval"].touch()
+    counts = {split or "rejected": writer.count for split, writer in writers.items()}
+    if counts["eval"] == 0 or counts["training"] == 0:
+        raise ConvertError(
+            f"{counts['training']} training and {counts['eval']} eval records: finetune.py needs both. "
+            "Use a positive --eval-fraction and at least 2 valid records."
+        )
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("inputs", nargs="+", help="JSONL files of nested records")
+    parser.add_argument("--out", required=True, help="output directory, e.g. data/compsci")
+    parser.add_argument("--eval-fraction", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--shard-records", type=int, default=None, help="records per output shard")
+    args = parser.parse_args()
+
+    try:
+        counts = convert(args.inputs, args.out, args.eval_fraction, args.workers, args.batch_size, args.shard_records)
+    except ConvertError as e:
+        sys.exit(f"error: {e}")
+    print(f"training {counts['training']}  eval {counts['eval']}  rejected {counts['rejected']}")
+    if counts["rejected"]:
+        print(f"see {Path(args.out) / 'rejected.jsonl'} for the failures", file=sys.stderr)
@@ -1,37 +1,323 @@
-import cohere
-from dotenv import dotenv_values
-from cohere.finetuning import Settings, FinetunedModel, BaseModel
+"""
+Uploads fine-tuning datasets and launches Cohere fine-tunes, one per subject, concurrently.
+
+    python finetune.py compsci calculus [--name compsci=cs-generator-v1] [--poll 30]
+
+Each subject's data/<subject>/training.jsonl and eval.jsonl are fingerprinted (SHA-256 of their
+bytes); the training-00000.jsonl, ... shards convert.py --shard-records writes are read in their place
+and uploaded as one file each. A local manifest (.finetune.sqlite) maps fingerprints to uploaded dataset ids and model
+names to fine-tune ids, so unchanged data is never sent twice and an interrupted run picks up
+where it stopped: rerunning polls the dataset or fine-tune already in flight instead of creating
+another one. Status is polled asynchronously, so several subjects upload and train at once.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
 from pathlib import Path
 
-MODEL_NAME = "cs-generator-v1"
-training_path = Path("data/compsci/training.jsonl")
-eval_path = Path("data/compsci/eval.jsonl")
-
-
-config = dotenv_values(Path("../.env"))
-co = cohere.ClientV2(config.get("COHERE_KEY"))
-
-chat_dataset = co.datasets.create(
-    name="cs-dataset",
-    data=open(training_path, "rb"),
-    eval_data=open(eval_path, "rb"),
-    type="chat-finetune-input",
-)
-result = co.wait(chat_dataset)
-
-print(result)
-print("------------")
-
-create_response = co.finetuning.create_finetuned_model(
-    request=FinetunedModel(
-        name=MODEL_NAME,
-        settings=Settings(
-            base_model=BaseModel(
-                base_type="BASE_TYPE_CHAT",
-            ),
-            dataset_id=chat_dataset.id,
-        ),
-    ),
-)
-print(create_response)
-print("FINETUNING COMPLETED")
+from dotenv import dotenv_values
+
+TRAINING_DIR = Path(__file__).resolve().parent
+DATA_DIR = TRAINING_DIR / "data"
+MANIFEST_PATH = TRAINING_DIR / ".finetune.sqlite"
+MODEL_NAMES = {"compsci": "cs-generator-v1"}
+
+DATASET_DONE = {"validated", "skipped"}
+DATASET_FAILED = {"failed"}
+FINETUNE_DONE = {"STATUS_READY"}
+FINETUNE_FAILED = {"STATUS_FAILED", "STATUS_DELETED"}
+
+
+class FinetuneError(Exception):
+    pass
+
+
+def fingerprint(*paths):
+    """
+    SHA-256 over the files' bytes, read in chunks. The order of paths is part of the fingerprint.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(Path(path).name.encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def status_of(value):
+    # the SDK returns plain strings for these enums, but may hand back an Enum for unknown values
+    return getattr(value, "value", value)
+
+
+class FinetuneManifest:
+    """
+    SQLite record of uploaded datasets (by fingerprint) and launched fine-tunes (by model name).
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS datasets (
+                fingerprint TEXT PRIMARY KEY,
+                dataset_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS finetunes (
+                name TEXT PRIMARY KEY,
+                subject TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                dataset_id TEXT NOT NULL,
+                finetune_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                updated REAL NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+
+    def dataset(self, fingerprint):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT dataset_id, status FROM datasets WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+        return {"dataset_id": row[0], "status": row[1]} if row else None
+
+    def save_dataset(self, fingerprint, dataset_id, name, status, error=None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO datasets (fingerprint, dataset_id, name, status, error, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint, dataset_id, name, status, error, time.time()),
+            )
+            self._db.commit()
+
+    def finetune(self, name):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint, finetune_id, status FROM finetunes WHERE name = ?", (name,)
+            ).fetchone()
+        return {"fingerprint": row[0], "finetune_id": row[1], "status": row[2]} if row else None
+
+    def save_finetune(self, name, subject, fingerprint, dataset_id, finetune_id, status):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO finetunes (name, subject, fingerprint, dataset_id, finetune_id, status, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, subject, fingerprint, dataset_id, finetune_id, status, time.time()),
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def joined(paths, stack):
+    """
+    An open binary file with the contents of paths in order: the file itself for one path, else a
+    temporary file the shards are copied into (never held in memory). stack closes it.
+    """
+    if len(paths) == 1:
+        return stack.enter_context(open(paths[0], "rb"))
+    joined = stack.enter_context(tempfile.TemporaryFile())
+    for path in paths:
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, joined)
+    joined.seek(0)
+    return joined
+
+
+class FinetuneOrchestrator:
+    """
+    Drives dataset upload, validation and fine-tuning for subjects on an async Cohere client
+    (cohere.AsyncClientV2, or benchmarks/fake_cohere.AsyncFakeCohere offline).
+
+    Polls start at one second and back off to poll_interval; timeout bounds the wait on each subject.
+    """
+
+    def __init__(self, co, manifest, data_dir=DATA_DIR, poll_interval=30.0, timeout=None, log=print):
+        self.co = co
+        self.manifest = manifest
+        self.data_dir = Path(data_dir)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.log = log
+        self.uploads = 0
+        self.reused = 0
+
+    def paths(self, subject):
+        """
+        (training files, eval files) for a subject: name.jsonl, or its shards name-00000.jsonl, ... in order.
+        """
+        found = []
+        for name in ("training", "eval"):
+            path = self.data_dir / subject / f"{name}.jsonl"
+            files = [path] if path.is_file() else sorted((self.data_dir / subject).glob(f"{name}-[0-9]*.jsonl"))
+            if not files:
+                raise FinetuneError(f"{path} does not exist (nor do {name}-*.jsonl shards).")
+            found.append(files)
+        return tuple(found)
+
+    async def poll(self, fetch, done, failed, describe):
+        """
+        Calls fetch() until its status is in done or failed, and returns the final status.
+        """
+        delay = min(1.0, self.poll_interval)
+        last = None
+        while True:
+            status = await fetch()
+            if status != last:
+                self.log(f"{describe}: {status}")
+                last = status
+            if status in done or status in failed:
+                return status
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.poll_interval)
+
+    async def dataset(self, subject):
+        """
+        Returns (fingerprint, dataset_id) of a validated dataset for the subject's files, uploading
+        them only if no upload of the same bytes is recorded.
+        """
+        training, eval = self.paths(subject)
+        digest = await asyncio.to_thread(fingerprint, *training, *eval)
+        entry = self.manifest.dataset(digest)
+        name = f"{subject}-dataset-{digest[:12]}"
+
+        if entry is not None and entry["status"] not in DATASET_FAILED:
+            dataset_id = entry["dataset_id"]
+            self.reused += 1
+            self.log(f"{subject}: reusing dataset {dataset_id} for unchanged data")
+        else:
+            with contextlib.ExitStack() as stack:
+                data, eval_data = await asyncio.to_thread(
+                    lambda: (joined(training, stack), joined(eval, stack))
+                )
+                response = await self.co.datasets.create(
+                    name=name, data=data, eval_data=eval_data, type="chat-finetune-input"
+                )
+            dataset_id = response.id
+            self.uploads += 1
+            self.manifest.save_dataset(digest, dataset_id, name, "queued")
+            self.log(f"{subject}: uploaded dataset {dataset_id}")
+        if entry is not None and entry["status"] in DATASET_DONE:
+            return digest, dataset_id
+
+        dataset = None
+
+        async def fetch():
+            nonlocal dataset
+            dataset = (await self.co.datasets.get(dataset_id)).dataset
+            status = status_of(dataset.validation_status)
+            self.manifest.save_dataset(digest, dataset_id, name, status, dataset.validation_error)
+            return status
+
+        status = await self.poll(fetch, DATASET_DONE, DATASET_FAILED, f"{subject}: dataset {dataset_id}")
+        if status in DATASET_FAILED:
+            raise FinetuneError(f"Dataset {dataset_id} failed validation: {dataset.validation_error}")
+        return digest, dataset_id
+
+    async def finetune(self, subject, name=None, base_type="BASE_TYPE_CHAT"):
+        """
+        Uploads (or reuses) the subject's dataset, launches the fine-tune (or resumes the one
+        recorded for the same name and data) and waits for it. Returns the fine-tune id.
+        """
+        from cohere.finetuning import BaseModel, FinetunedModel, Settings
+
+        name = name or MODEL_NAMES.get(subject, f"{subject}-generator-v1")
+        digest, dataset_id = await self.dataset(subject)
+
+        entry = self.manifest.finetune(name)
+        if entry is not None and entry["fingerprint"] == digest and entry["status"] not in FINETUNE_FAILED:
+            finetune_id = entry["finetune_id"]
+            self.log(f"{subject}: resuming fine-tune {finetune_id} ({name})")
+        else:
+            if entry is not None and entry["status"] not in FINETUNE_FAILED:
+                raise FinetuneError(
+                    f"{name} is fine-tune {entry['finetune_id']} on other data; pass a new model name with --name."
+                )
+            response = await self.co.finetuning.create_finetuned_model(
+                request=FinetunedModel(
+                    name=name,
+                    settings=Settings(base_model=BaseModel(base_type=base_type), dataset_id=dataset_id),
+                )
+            )
+            model = response.finetuned_model
+            finetune_id = model.id
+            self.manifest.save_finetune(name, subject, digest, dataset_id, finetune_id, status_of(model.status))
+            self.log(f"{subject}: started fine-tune {finetune_id} ({name})")
+
+        async def fetch():
+            model = (await self.co.finetuning.get_finetuned_model(finetune_id)).finetuned_model
+            status = status_of(model.status)
+            self.manifest.save_finetune(name, subject, digest, dataset_id, finetune_id, status)
+            return status
+
+        status = await self.poll(fetch, FINETUNE_DONE, FINETUNE_FAILED, f"{subject}: fine-tune {finetune_id}")
+        if status in FINETUNE_FAILED:
+            raise FinetuneError(f"Fine-tune {finetune_id} ({name}) ended with {status}.")
+        return finetune_id
+
+    async def run(self, subjects, names=None, base_type="BASE_TYPE_CHAT"):
+        """
+        Fine-tunes subjects concurrently. Returns {subject: fine-tune id or the exception it raised}.
+        """
+        names = names or {}
+
+        async def one(subject):
+            return await asyncio.wait_for(self.finetune(subject, names.get(subject), base_type), self.timeout)
+
+        results = await asyncio.gather(*(one(subject) for subject in subjects), return_exceptions=True)
+        for result in results:
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+        return dict(zip(subjects, results))
+
+
+async def main(args):
+    import cohere
+
+    config = dotenv_values(TRAINING_DIR.parent / ".env")
+    names = dict(name.split("=", 1) for name in args.name)
+    manifest = FinetuneManifest(args.manifest)
+    try:
+        async with cohere.AsyncClientV2(config.get("COHERE_KEY")) as co:
+            orchestrator = FinetuneOrchestrator(co, manifest, args.data, args.poll, args.timeout)
+            results = await orchestrator.run(args.subjects, names, args.base_type)
+    finally:
+        manifest.close()
+    failed = False
+    for subject, result in results.items():
+        if isinstance(result, BaseException):
+            failed = True
+            print(f"{subject}: FAILED {type(result).__name__}: {result}")
+        else:
+            print(f"{subject}: ready as {result}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("subjects", nargs="+", help="subject folders under data/, e.g. compsci calculus")
+    parser.add_argument("--name", action="append", default=[], metavar="SUBJECT=MODEL_NAME")
+    parser.add_argument("--base-type", default="BASE_TYPE_CHAT")
+    parser.add_argument("--data", default=DATA_DIR)
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--poll", type=float, default=30.0, help="longest wait between status checks, in seconds")
+    parser.add_argument("--timeout", type=float, default=None, help="give up on a subject after this many seconds")
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
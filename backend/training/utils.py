@@ -1,10 +1,6 @@
-import cohere
-from dotenv import dotenv_values
 import json
 
-MODEL_NAME = "test-finetune-model"
-config = dotenv_values(".env")
-co = cohere.ClientV2(config.get("COHERE_KEY"))
+ROLES = {"System", "User", "Chatbot"}
 
 
 def normalize_spaces(text):
@@ -29,19 +25,29 @@ def convert_dataset_format(nested_dataset):
             converted_messages.append({"role": "System", "content": message["content"]})
         elif message["role"] == "User":
             # Keep user messages as is
-            converted_messages.append({"role": "User", "content": "Numbers and Algebra"})
+            converted_messages.append({"role": "User", "content": message["content"]})
         elif message["role"] == "Chatbot":
             # Flatten the nested content structure
             content_dict = message["content"]
+            if isinstance(content_dict, str):
+                # already flattened
+                converted_messages.append({"role": "Chatbot", "content": content_dict})
+                continue
 
             # Create the flattened content string
-            flattened_content = f"""
-            content: {content_dict['content']}
-            marks: {content_dict['marks']}
-            markscheme: {content_dict['markscheme']}
-            subtopics: {content_dict['subtopics']}
-            topic: {content_dict['topic']}
-            """
+            if "parts" in content_dict:
+                flattened_content = f"""
+                topic: {content_dict['topic']}
+                parts: {json.dumps(content_dict['parts'], ensure_ascii=False)}
+                """
+            else:
+                flattened_content = f"""
+                content: {content_dict['content']}
+                marks: {content_dict['marks']}
+                markscheme: {content_dict['markscheme']}
+                subtopics: {content_dict['subtopics']}
+                topic: {content_dict['topic']}
+                """
 
             # Create the flattened message
             flattened_message = {"role": "Chatbot", "content": normalize_spaces(flattened_content)}
@@ -52,5 +58,29 @@ def convert_dataset_format(nested_dataset):
     return output
 
 
-with open("output.json", "w") as f:
-    json.dump(convert_dataset_format(eval_data), f)
+def validate_record(record):
+    """
+    Checks a converted record against Cohere's chat-finetune-input format; returns a list of failures.
+    """
+    messages = record.get("messages") if isinstance(record, dict) else None
+    if not isinstance(messages, list) or not messages:
+        return ["Record has no 'messages' list."]
+
+    failures = []
+    for index, message in enumerate(messages):
+        role = message.get("role") if isinstance(message, dict) else None
+        if role not in ROLES:
+            failures.append(f"Message {index}: role must be one of {sorted(ROLES)}, got {role!r}.")
+            continue
+        if role == "System" and index != 0:
+            failures.append(f"Message {index}: a System message is only allowed first.")
+        content = message.get("content")
+        if not isinstance(content, str) or not content.strip():
+            failures.append(f"Message {index}: content must be a non-empty string.")
+
+    roles = [message.get("role") for message in messages if isinstance(message, dict)]
+    if "User" not in roles or "Chatbot" not in roles:
+        failures.append("Record needs at least one User and one Chatbot message.")
+    elif roles[-1] != "Chatbot":
+        failures.append("The last message must be from the Chatbot.")
+    return failures
@@ -38,6 +38,7 @@ if errorlevel 1 (
     exit /b 1
 )
 cd /d %BACKEND_DIR%
+python bundle.py static
 pyinstaller --noconfirm --onefile --add-data "static;static" --add-data ".env;." --name %EXE_NAME% %MAIN_SCRIPT%
 if errorlevel 1 (
     echo backend bundle failed.
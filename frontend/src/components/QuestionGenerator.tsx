@@ -1,5 +1,4 @@
 import { useState } from "react";
-import axios from "axios";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import {
@@ -32,6 +31,7 @@ const QuestionGenerator = () => {
   const [topic, setTopic] = useState("");
   const [level, setLevel] = useState("");
   const [isLoading, setIsLoading] = useState(false);
+  const [stage, setStage] = useState("");
   const [generatedQuestion, setGeneratedQuestion] =
     useState<GeneratedQuestion | null>(null);
   const { toast } = useToast();
@@ -40,6 +40,13 @@ const QuestionGenerator = () => {
 
   const levels = ["SL", "HL"];
 
+  const stageLabels: Record<string, string> = {
+    formatted: "Draft ready, judging question...",
+    judge_question: "Judging question...",
+    judge_markscheme: "Judging markscheme...",
+    finalized: "Done",
+  };
+
   const mathSubtopics = [
     "Number and Algebra",
     "Functions",
@@ -79,37 +86,75 @@ const QuestionGenerator = () => {
     setIsLoading(true);
 
     try {
-      const response = await axios.post(
-        `http://127.0.0.1:8000/generate/${
-          subject === "Mathematics AA"
-            ? "math"
-            : subject === "Computer Science"
-            ? "cs"
-            : null
-        }`,
-        {
-          topic: topic,
-          level: level,
-        },
+      const endpoint =
+        subject === "Mathematics AA"
+          ? "math"
+          : subject === "Computer Science"
+          ? "cs"
+          : null;
+
+      // The stream sends an event after each pipeline stage, so the draft shows up
+      // as soon as it is formatted and is then updated in place by each judge pass.
+      const response = await fetch(
+        `http://127.0.0.1:8000/generate/${endpoint}/stream`,
         {
+          method: "POST",
           headers: {
             "Content-Type": "application/json",
           },
+          body: JSON.stringify({
+            topic: topic,
+            level: level,
+          }),
         }
       );
 
-      // Extract the generated question from response
-      const generatedQuestion: GeneratedQuestion = {
-        id: response.data.id,
-        parts: response.data.parts,
-        subject: subject,
-        question:
-          subject === "Computer Science" ? response.data.question : undefined,
-      };
+      if (!response.ok || !response.body) {
+        throw new Error(`Server error (${response.status}). Please try again later.`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let finalized = false;
+
+      while (!finalized) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split("\n\n");
+        buffer = events.pop() ?? "";
 
-      setGeneratedQuestion(generatedQuestion);
+        for (const rawEvent of events) {
+          const dataLine = rawEvent
+            .split("\n")
+            .find((line) => line.startsWith("data: "));
+          if (!dataLine) continue;
 
-      console.log(generatedQuestion);
+          const event = JSON.parse(dataLine.slice("data: ".length));
+          if (event.stage === "error") {
+            throw new Error(event.error);
+          }
+          if (!event.question) continue;
+
+          setStage(stageLabels[event.stage] ?? event.stage);
+          setGeneratedQuestion({
+            id: event.question.id ?? "Draft",
+            parts: event.question.parts,
+            subject: subject,
+            question:
+              subject === "Computer Science"
+                ? event.question.question
+                : undefined,
+          });
+          finalized = event.stage === "finalized";
+        }
+      }
+
+      if (!finalized) {
+        throw new Error("The connection closed before the question was finalized.");
+      }
 
       toast({
         title: "Question Generated!",
@@ -118,21 +163,10 @@ const QuestionGenerator = () => {
     } catch (error) {
       console.error("API Error:", error);
 
-      let errorMessage =
-        "There was an error generating your question. Please try again.";
-
-      if (axios.isAxiosError(error)) {
-        if (error.code === "ECONNABORTED") {
-          errorMessage = "Request timed out. Please try again.";
-        } else if (error.response?.status === 400) {
-          errorMessage =
-            "Invalid request parameters. Please check your selections.";
-        } else if (error.response?.status === 500) {
-          errorMessage = "Server error. Please try again later.";
-        } else if (error.response?.data?.message) {
-          errorMessage = error.response.data.message;
-        }
-      }
+      const errorMessage =
+        error instanceof Error && error.message
+          ? error.message
+          : "There was an error generating your question. Please try again.";
 
       toast({
         title: "Generation Failed",
@@ -141,6 +175,7 @@ const QuestionGenerator = () => {
       });
     } finally {
       setIsLoading(false);
+      setStage("");
     }
   };
 
@@ -251,7 +286,7 @@ const QuestionGenerator = () => {
 
                 {isLoading && (
                   <p className="mt-2 text-sm text-muted-foreground">
-                    This may take a while...
+                    {stage || "This may take a while..."}
                   </p>
                 )}
               </div>